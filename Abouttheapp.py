@@ -1,4 +1,5 @@
 import tkinter as tk
+from detection_sessions import mode_window, run_mode_window
 from tkinter import Canvas
 
 class ObjectRecognitionApp:
@@ -83,6 +84,6 @@ class ObjectRecognitionApp:
             canvas.create_rectangle(0, i * 10, self.root.winfo_screenwidth(), (i + 1) * 10, fill=hex_color, outline=hex_color)
 
 # Create and run the GUI application
-root = tk.Tk()
+root = mode_window("About Object Recognition System", globals().get("launcher_root"))
 app = ObjectRecognitionApp(root)
-root.mainloop()
+run_mode_window(root)
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+
+# Inference sizes the controller moves between (multiples of 32, smallest first)
+SIZES = (320, 416, 480, 640)
+
+# Every adjustment is appended here as one JSON line
+LOG_FILE = "adaptive_control.log"
+
+_log_lock = threading.Lock()
+
+
+class AdaptiveController:
+    """
+    Keeps inference inside a latency budget by changing the inference size
+    and the stride (run the model on every Nth frame) at runtime.
+    The budget is 'target_ms' per frame, or 1000 / 'target_fps'.
+    Decisions use the model call's latency (record(), smoothed as an EWMA
+    with weight 'alpha') and its share of each frame, latency / stride. The
+    time between frames is not used: a camera slower than the target frame
+    rate cannot be helped by a smaller size or a larger stride.
+    While one call takes more than 'high' x budget the size shrinks. At the
+    smallest size the stride grows while the model's share is still above
+    'high' x budget, and shrinks again once the share with one step less
+    fits. At stride 1 and below 'low' x budget the size grows, but only when
+    the larger size is expected to still fit (latency grows with the pixel
+    count). After each change it waits 'patience' measurements, so it does
+    not flip back and forth. The time between frames (should_run()) is only
+    reported, in state() and the log.
+    """
+
+    def __init__(self, target_ms=None, target_fps=None, sizes=SIZES, imgsz=480, max_stride=4,
+                 alpha=0.2, low=0.7, high=1.1, patience=15, name="camera", log_file=LOG_FILE):
+        if target_ms is None and target_fps is None:
+            raise ValueError("Give target_ms or target_fps")
+        self.budget_ms = target_ms if target_ms is not None else 1000.0 / target_fps
+        self.sizes = sorted(sizes)
+        # Start at the closest allowed size to the one asked for
+        self.level = min(range(len(self.sizes)), key=lambda i: abs(self.sizes[i] - imgsz))
+        self.stride = 1
+        self.max_stride = max_stride
+        self.alpha = alpha
+        self.low = low
+        self.high = high
+        self.patience = patience
+        self.name = name
+        self.log_file = log_file
+        self.ewma = None           # Smoothed model latency (ms)
+        self.frame_ms = None       # Smoothed time between frames (ms), reported only
+        self.last_frame = None
+        self.samples_since_change = 0
+        self.frames = 0
+        self.adjustments = 0
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.level]
+
+    def should_run(self, now=None):
+        """ Call once per frame: True on the frames the model should run on (every 'stride'th). """
+        now = time.perf_counter() if now is None else now
+        if self.last_frame is not None:
+            frame_ms = (now - self.last_frame) * 1000
+            self.frame_ms = frame_ms if self.frame_ms is None else self.alpha * frame_ms + (1 - self.alpha) * self.frame_ms
+        self.last_frame = now
+        run = self.frames % self.stride == 0
+        self.frames += 1
+        return run
+
+    def record(self, latency_ms):
+        """ Feeds the latency of one model call; may change imgsz / stride. Returns True if something changed. """
+        self.ewma = latency_ms if self.ewma is None else self.alpha * latency_ms + (1 - self.alpha) * self.ewma
+        self.samples_since_change += 1
+        if self.samples_since_change < self.patience:
+            return False
+
+        old = (self.imgsz, self.stride)
+        high, low = self.high * self.budget_ms, self.low * self.budget_ms
+        # One model call is spread over 'stride' frames
+        share = self.ewma / self.stride
+        if self.ewma > high and self.level > 0:
+            self.level -= 1
+            reason = "over budget"
+        elif share > high and self.stride < self.max_stride:
+            self.stride += 1
+            reason = "over budget at the smallest size"
+        elif self.stride > 1 and self.ewma / (self.stride - 1) < high:
+            self.stride -= 1
+            reason = "stride no longer needed"
+        elif self.ewma < low and self.stride == 1 and self.level < len(self.sizes) - 1:
+            growth = (self.sizes[self.level + 1] / self.imgsz) ** 2
+            if self.ewma * growth >= high:
+                return False
+            self.level += 1
+            reason = "under budget"
+        else:
+            return False
+
+        self.adjustments += 1
+        self.samples_since_change = 0
+        self._log(old, reason)
+        # The old averages belong to the old setting; start again from the next measurements
+        self.ewma = None
+        self.frame_ms = None
+        return True
+
+    def _log(self, old, reason):
+        entry = {"time": round(time.time(), 3), "camera": self.name, "reason": reason,
+                 "latency_ms": round(self.ewma, 1), "budget_ms": round(self.budget_ms, 1),
+                 "frame_ms": round(self.frame_ms, 1) if self.frame_ms is not None else None,
+                 "imgsz": [old[0], self.imgsz], "stride": [old[1], self.stride]}
+        print(f"[{self.name}] {reason} ({entry['latency_ms']} ms per call, {entry['frame_ms']} ms per frame, "
+              f"budget {entry['budget_ms']} ms): "
+              f"imgsz {old[0]} -> {self.imgsz}, stride {old[1]} -> {self.stride}")
+        if self.log_file:
+            with _log_lock, open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def state(self):
+        return {"imgsz": self.imgsz, "stride": self.stride, "budget_ms": round(self.budget_ms, 1),
+                "latency_ms": round(self.ewma, 1) if self.ewma is not None else None,
+                "frame_ms": round(self.frame_ms, 1) if self.frame_ms is not None else None,
+                "adjustments": self.adjustments}
@@ -0,0 +1,196 @@
+import argparse
+import collections
+import glob
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from model_host import get_model, predict
+from detection_records import DetectionFileWriter, records_from_result
+from result_cache import ResultCache, boxes_of, detect_settings, make_result, model_id
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Name of the file (inside the output folder) listing images that are already done. Each line is
+# "<absolute image path>\t<size of the detections file once that image's records were written>"
+PROGRESS_FILE = "progress.txt"
+
+
+def find_images(source):
+    """ Returns a sorted list of image paths from a folder (searched recursively) or a glob pattern. """
+    if os.path.isdir(source):
+        paths = []
+        for folder, _, files in os.walk(source):
+            paths.extend(os.path.join(folder, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+    else:
+        paths = [p for p in glob.glob(source, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS)]
+    return sorted(paths)
+
+
+def load_progress(out_dir):
+    """
+    Reads the progress of an earlier (possibly interrupted) run. Returns the set
+    of finished images (absolute paths) and the detections file size that goes
+    with them, or None if no size was recorded.
+    """
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    done, committed = set(), None
+    if not os.path.exists(path):
+        return done, committed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            image, _, size = line.rpartition("\t")
+            if image and size.isdigit():
+                done.add(os.path.abspath(image))
+                committed = int(size)
+            else:
+                done.add(os.path.abspath(line))  # Written by an older version: path only
+    return done, committed
+
+
+def decode(path):
+    """ Reads one image in a worker thread; returns (path, image or None, content digest). """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return path, None, None
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return path, image, hashlib.sha256(data).hexdigest()
+
+
+def run_batch(source, out_dir, batch_size=16, workers=4, imgsz=640, conf=0.25,
+              detections_file="detections.jsonl", save_annotated=True, resume=True, use_cache=True):
+    """
+    Detects objects in every image matched by 'source' and streams the results
+    to 'out_dir': annotated copies under annotated/ and one record per box in
+    'detections_file' (.jsonl or .csv). With resume=True images listed in the
+    progress file are skipped, so an interrupted run can simply be restarted.
+    With use_cache=True images whose content was already detected with the same
+    settings (in any run, under any name) are not sent through the model again.
+    """
+    model = get_model('yolov8n.pt')
+    cache = ResultCache(model_id('yolov8n.pt')) if use_cache else None
+    settings = detect_settings(imgsz, conf)  # Same cache keys as the image window (opt1)
+    os.makedirs(out_dir, exist_ok=True)
+    annotated_dir = os.path.join(out_dir, "annotated")
+    if save_annotated:
+        os.makedirs(annotated_dir, exist_ok=True)
+
+    paths = find_images(source)
+    done, committed = load_progress(out_dir) if resume else (set(), None)
+    # Absolute paths, so a restart from another folder or with another spelling of 'source' still matches
+    todo = [p for p in paths if os.path.abspath(p) not in done]
+    root_dir = os.path.commonpath([os.path.abspath(p) for p in paths]) if paths else ""
+    if os.path.isfile(root_dir):
+        root_dir = os.path.dirname(root_dir)
+    print(f"{len(paths)} images found, {len(paths) - len(todo)} already done, {len(todo)} to process")
+
+    detections_path = os.path.join(out_dir, detections_file)
+    if not resume and os.path.exists(detections_path):
+        os.remove(detections_path)
+    elif os.path.exists(detections_path):
+        # Records past the size saved with the last progress line belong to images that were not marked
+        # done before the interruption; they are detected again, so drop them instead of duplicating them
+        if committed is None and not done:
+            committed = 0
+        if committed is not None and os.path.getsize(detections_path) > committed:
+            with open(detections_path, "r+b") as f:
+                f.truncate(committed)
+    writer = DetectionFileWriter(detections_path)
+    progress = open(os.path.join(out_dir, PROGRESS_FILE), "a" if resume else "w", encoding="utf-8")
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    processed = 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def handle(futures):
+            nonlocal processed
+            decoded = [f.result() for f in futures]
+            for path, image, _ in decoded:
+                if image is None:
+                    print(f"Skipping unreadable image {path}")
+            decoded = [item for item in decoded if item[1] is not None]
+
+            # Cached images skip the model; the rest go through it in one call
+            results = [None] * len(decoded)
+            keys = [cache.key(digest, **settings) if cache else None for _, _, digest in decoded]
+            if cache:
+                for i, (path, image, _) in enumerate(decoded):
+                    boxes = cache.get(keys[i])
+                    if boxes is not None:
+                        results[i] = make_result(boxes, image, model.names, path)
+            missing = [i for i, result in enumerate(results) if result is None]
+            if missing:
+                inferred = predict(model, [decoded[i][1] for i in missing], **settings)
+                for i, result in zip(missing, inferred):
+                    results[i] = result
+                    if cache:
+                        cache.put(keys[i], boxes_of(result))
+
+            writes = []
+            if decoded:
+                for (path, _, _), result in zip(decoded, results):
+                    writer.write(records_from_result(result, source=path))
+                    if save_annotated:
+                        out_path = os.path.join(annotated_dir, os.path.relpath(os.path.abspath(path), root_dir))
+                        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                        writes.append(pool.submit(cv2.imwrite, out_path, result.plot()))
+
+            # Outputs are on disk before the images are marked as done; each progress line carries the
+            # detections file size, so a resume can cut off records of a batch that was never marked done
+            writer.flush()
+            size = os.path.getsize(detections_path)
+            for w in writes:
+                w.result()
+            for f in futures:
+                progress.write(f"{os.path.abspath(f.result()[0])}\t{size}\n")
+            progress.flush()
+            processed += len(futures)
+            elapsed = time.perf_counter() - start
+            print(f"{processed}/{len(todo)} images, {processed / elapsed:.1f} img/s"
+                  + (f", {cache.hits} from cache" if cache else ""))
+
+        # Keep a couple of batches decoding ahead of the one being detected
+        pending = collections.deque()
+        try:
+            for batch in batches:
+                pending.append([pool.submit(decode, p) for p in batch])
+                if len(pending) > 2:
+                    handle(pending.popleft())
+            while pending:
+                handle(pending.popleft())
+        finally:
+            writer.close()
+            progress.close()
+
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch object detection over a folder or glob of images.")
+    parser.add_argument("source", help="folder of images or a glob such as 'archive/**/*.jpg'")
+    parser.add_argument("--out", default="batch_output", help="output folder")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4, help="image decode/encode threads")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--detections", default="detections.jsonl", help="detections file name (.jsonl or .csv)")
+    parser.add_argument("--no-annotated", action="store_true", help="do not save annotated images")
+    parser.add_argument("--restart", action="store_true", help="ignore progress from an earlier run")
+    parser.add_argument("--no-cache", action="store_true", help="always run the model, even for images seen before")
+    args = parser.parse_args(argv)
+
+    run_batch(args.source, args.out, args.batch_size, args.workers, args.imgsz, args.conf,
+              args.detections, not args.no_annotated, not args.restart, not args.no_cache)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+from model_host import get_model, get_tracker_model, predict, track
+from frame_sources import open_source
+from renderer import make_renderer, LEAN, PLOT
+
+# Stages timed separately for every frame ("plot" is whichever renderer is configured)
+STAGES = ("capture", "preprocess", "inference", "postprocess", "plot", "overlay", "write", "total")
+
+
+def summarize(samples_ms):
+    """ p50/p95/p99/mean/max of a list of millisecond timings. """
+    if not samples_ms:
+        return {}
+    values = np.array(samples_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def draw_overlay(frame, count):
+    """ Same drawing the live loops do on top of plot(): exit button and object count. """
+    height, width = frame.shape[:2]
+    cv2.rectangle(frame, (width - 80, height - 50), (width - 20, height - 20), (0, 0, 255), -1)
+    cv2.putText(frame, "EXIT", (width - 70, height - 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    cv2.putText(frame, f"Total: {count}", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+
+
+def run_config(source_spec, imgsz, conf, backend, loop="predict", frames=200, warmup=10, renderer=PLOT):
+    """
+    Runs the live detection loop headless on a recorded or synthetic source
+    and returns per-stage latency percentiles and sustained FPS.
+    """
+    # Tracking gets its own model instance (see model_host.get_tracker_model)
+    if loop == "track":
+        model = get_tracker_model('yolov8n.pt', backend)
+        infer = lambda frame, **settings: track(model, frame, **settings)
+    else:
+        model = get_model('yolov8n.pt', backend)
+        infer = lambda frame, **settings: predict(model, frame, **settings)
+    source = open_source(source_spec, realtime=False)
+    render = make_renderer(renderer)
+    timings = {stage: [] for stage in STAGES}
+
+    out_path = os.path.join(tempfile.mkdtemp(prefix="bench_"), "out.mp4")
+    writer = None
+    measured = 0
+    start_wall = None
+
+    for index in range(frames + warmup):
+        if index == warmup:
+            start_wall = time.perf_counter()
+            timings = {stage: [] for stage in STAGES}
+
+        t0 = time.perf_counter()
+        success, frame = source.read()
+        if not success:
+            break
+        t1 = time.perf_counter()
+        results = infer(frame, imgsz=imgsz, conf=conf, classes=None)
+        t2 = time.perf_counter()
+        annotated = render(frame, results[0])
+        t3 = time.perf_counter()
+        draw_overlay(annotated, len(results[0].boxes))
+        t4 = time.perf_counter()
+        if writer is None:
+            writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*'mp4v'), 20.0,
+                                     (annotated.shape[1], annotated.shape[0]))
+        writer.write(annotated)
+        t5 = time.perf_counter()
+
+        # ultralytics reports its own preprocess / inference / postprocess split in ms
+        speed = results[0].speed
+        timings["capture"].append((t1 - t0) * 1000)
+        timings["preprocess"].append(speed.get("preprocess", 0.0))
+        timings["inference"].append(speed.get("inference", 0.0))
+        timings["postprocess"].append(speed.get("postprocess", 0.0))
+        timings["plot"].append((t3 - t2) * 1000)
+        timings["overlay"].append((t4 - t3) * 1000)
+        timings["write"].append((t5 - t4) * 1000)
+        timings["total"].append((t5 - t0) * 1000)
+        if index >= warmup:
+            measured += 1
+
+    elapsed = time.perf_counter() - start_wall if start_wall else 0.0
+    if writer is not None:
+        writer.release()
+    source.release()
+
+    return {
+        "config": {"source": str(source_spec), "imgsz": imgsz, "conf": conf, "backend": backend, "loop": loop,
+                   "renderer": renderer},
+        "frames": measured,
+        "sustained_fps": round(measured / elapsed, 2) if elapsed else 0.0,
+        "stages_ms": {stage: summarize(values) for stage, values in timings.items()},
+    }
+
+
+def environment():
+    """ Where the numbers came from, so runs on different commits can be compared. """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "opencv": cv2.__version__,
+    }
+
+
+def compare(report, baseline):
+    """ Prints FPS and p50 total latency changes against an earlier report. """
+    def key(config):
+        return json.dumps({"renderer": PLOT, **config}, sort_keys=True)  # Older reports only used plot()
+
+    old = {key(run["config"]): run for run in baseline["runs"]}
+    for run in report["runs"]:
+        before = old.get(key(run["config"]))
+        if before is None:
+            continue
+        fps_change = (run["sustained_fps"] / before["sustained_fps"] - 1) * 100 if before["sustained_fps"] else 0.0
+        print(f"{run['config']}: fps {before['sustained_fps']} -> {run['sustained_fps']} ({fps_change:+.1f}%), "
+              f"p50 {before['stages_ms']['total'].get('p50')} -> {run['stages_ms']['total'].get('p50')} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-stage benchmark of the live detection loop.")
+    parser.add_argument("--source", default="synthetic", help="'synthetic', 'synthetic:WxH' or a video file")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[480, 640])
+    parser.add_argument("--conf", type=float, nargs="+", default=[0.25])
+    parser.add_argument("--backend", nargs="+", default=["torch"])
+    parser.add_argument("--loop", choices=["predict", "track"], default="predict",
+                        help="predict = opt3 loop, track = opt2 loop")
+    parser.add_argument("--renderer", nargs="+", default=[PLOT], choices=[PLOT, LEAN],
+                        help="'plot' = result.plot(), 'lean' = renderer.LeanRenderer")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--out", default="benchmark.json", help="JSON report file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "runs": []}
+    for imgsz, conf, backend, renderer in itertools.product(args.imgsz, args.conf, args.backend, args.renderer):
+        run = run_config(args.source, imgsz, conf, backend, args.loop, args.frames, args.warmup, renderer)
+        report["runs"].append(run)
+        total = run["stages_ms"]["total"]
+        print(f"imgsz={imgsz} conf={conf} backend={backend} renderer={renderer}: {run['sustained_fps']} fps, "
+              f"total p50/p95/p99 = {total.get('p50')}/{total.get('p95')}/{total.get('p99')} ms")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import collections
+import threading
+import time
+
+
+class DropOldestQueue:
+    """ Bounded queue that throws away the oldest item when a new one arrives and it is full. """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0  # Number of items overwritten before anyone read them
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """ Returns the oldest waiting item, or None on timeout / after close(). """
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class CaptureThread(threading.Thread):
+    """ Reads frames from a cv2.VideoCapture-like source as fast as it delivers them. """
+
+    def __init__(self, source, out_queue):
+        super().__init__(daemon=True)
+        self.source = source
+        self.out_queue = out_queue
+        self.stop_event = threading.Event()
+        self.frames = 0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            success, frame = self.source.read()
+            if not success:
+                break
+            # Each frame travels with its id and capture time
+            self.out_queue.put((self.frames, time.time(), frame))
+            self.frames += 1
+        self.out_queue.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class InferenceWorker(threading.Thread):
+    """
+    Takes the newest captured frame, runs infer(frame) on it and passes the result on.
+    on_result(frame_id, capture_time, results), if given, sees every result,
+    including the ones the render stage later drops. If infer or on_result
+    raises, the worker stops and keeps the exception in 'error'.
+    """
+
+    def __init__(self, infer, in_queue, out_queue, on_result=None):
+        super().__init__(daemon=True)
+        self.infer = infer
+        self.on_result = on_result
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.stop_event = threading.Event()
+        self.frames = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                item = self.in_queue.get(timeout=0.1)
+                if item is None:
+                    if self.in_queue.closed:
+                        break
+                    continue
+                frame_id, capture_time, frame = item
+                results = self.infer(frame)
+                if self.on_result:
+                    self.on_result(frame_id, capture_time, results)
+                self.out_queue.put((frame_id, capture_time, frame, results))
+                self.frames += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            # The display loop waits for the result queue to close, so it always gets closed
+            self.out_queue.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class DetectionPipeline:
+    """
+    Capture -> inference -> render pipeline joined by drop-oldest queues.
+    Capture and inference run in background threads; the caller pulls
+    finished frames with next_result() from its own (display) thread.
+    """
+
+    def __init__(self, source, infer, queue_size=1, on_result=None):
+        self.capture_queue = DropOldestQueue(queue_size)
+        self.result_queue = DropOldestQueue(queue_size)
+        self.capture = CaptureThread(source, self.capture_queue)
+        self.worker = InferenceWorker(infer, self.capture_queue, self.result_queue, on_result)
+        self.rendered = 0
+
+    def start(self):
+        self.capture.start()
+        self.worker.start()
+        return self
+
+    def next_result(self, timeout=0.1):
+        """
+        Returns (frame_id, capture_time, frame, results) or None if nothing new is ready.
+        Once the results before it are taken, re-raises the error that stopped the inference thread.
+        """
+        item = self.result_queue.get(timeout)
+        if item is not None:
+            self.rendered += 1
+        elif self.worker.error is not None:
+            raise self.worker.error
+        return item
+
+    def finished(self):
+        return self.result_queue.closed and len(self.result_queue) == 0
+
+    def stop(self):
+        self.capture.stop()
+        self.worker.stop()
+        self.capture.join(timeout=2)
+        self.worker.join(timeout=2)
+
+    def stats(self):
+        """ Frame counts per stage and how many frames each stage dropped. """
+        return {
+            "captured": self.capture.frames,
+            "inferred": self.worker.frames,
+            "rendered": self.rendered,
+            "dropped_before_inference": self.capture_queue.dropped,
+            "dropped_before_render": self.result_queue.dropped,
+        }
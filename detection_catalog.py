@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Catalog database shared by the capture (opt3) and viewer (opt4) windows
+CATALOG_PATH = "detections.db"
+
+# Catalogs opened with shared_catalog(), one per database file
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL DEFAULT '',
+    source TEXT NOT NULL DEFAULT '',
+    object_name TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS detections (
+    media_id INTEGER NOT NULL REFERENCES media(id) ON DELETE CASCADE,
+    class_name TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x1 REAL, y1 REAL, x2 REAL, y2 REAL
+);
+CREATE INDEX IF NOT EXISTS media_kind_time ON media(kind, created_at);
+CREATE INDEX IF NOT EXISTS media_path ON media(path);
+CREATE INDEX IF NOT EXISTS detections_class ON detections(class_name, media_id);
+"""
+
+
+class DetectionCatalog:
+    """
+    SQLite index of every saved screenshot and clip. New files get their number
+    from the autoincrement id, so naming is O(1) and numbers are never reused
+    after a file is deleted. The number is zero-padded so it can never collide
+    with files numbered by the old os.listdir() scheme.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA foreign_keys = ON")
+        self.db.executescript(SCHEMA)
+
+    def reserve(self, kind, folder, prefix, extension, source="", object_name=""):
+        """ Creates a catalog entry and returns (media_id, path) for the file to write. """
+        with self.lock, self.db:
+            cursor = self.db.execute(
+                "INSERT INTO media (kind, source, object_name, created_at) VALUES (?, ?, ?, ?)",
+                (kind, source, object_name, time.time()))
+            media_id = cursor.lastrowid
+            path = os.path.join(os.path.abspath(folder), f"{prefix}_{media_id:06d}{extension}")
+            self.db.execute("UPDATE media SET path = ? WHERE id = ?", (path, media_id))
+        return media_id, path
+
+    def add_detections(self, media_id, records):
+        """ Stores detection records (see detection_records.py) for a saved file. """
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT INTO detections (media_id, class_name, confidence, x1, y1, x2, y2) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(media_id, r["class_name"], r["confidence"], r["x1"], r["y1"], r["x2"], r["y2"]) for r in records])
+
+    def query(self, kind=None, class_name=None, since=None, until=None):
+        """ Returns saved files (newest first), optionally filtered by kind, detected class and time range. """
+        sql = "SELECT DISTINCT m.* FROM media m"
+        conditions, params = ["m.path != ''"], []
+        if class_name:
+            sql += " LEFT JOIN detections d ON d.media_id = m.id"
+            conditions.append("(lower(d.class_name) = lower(?) OR lower(m.object_name) = lower(?))")
+            params += [class_name, class_name]
+        if kind:
+            conditions.append("m.kind = ?")
+            params.append(kind)
+        if since is not None:
+            conditions.append("m.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("m.created_at <= ?")
+            params.append(until)
+        sql += " WHERE " + " AND ".join(conditions) + " ORDER BY m.created_at DESC"
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, params)]
+
+    def detections_for(self, media_id):
+        with self.lock:
+            return [dict(row) for row in self.db.execute("SELECT * FROM detections WHERE media_id = ?", (media_id,))]
+
+    def remove(self, path):
+        """ Forgets a file (and its detections) after it has been deleted from disk. """
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM media WHERE path = ?", (os.path.abspath(path),))
+
+    def is_empty(self):
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM media LIMIT 1").fetchone() is None
+
+    def import_folder(self, kind, folder, extensions):
+        """
+        Adds files in 'folder' that are not in the catalog yet, e.g. ones saved
+        before it existed. Safe to call on every start: files already listed are
+        skipped. The object name is taken from names like 'screenshot_person_3.jpg';
+        no detections are known for them.
+        """
+        if not os.path.isdir(folder):
+            return 0
+        added = 0
+        folder = os.path.abspath(folder)
+        with self.lock, self.db:
+            known = {row[0] for row in self.db.execute("SELECT path FROM media")}
+            for name in sorted(os.listdir(folder)):
+                if not name.lower().endswith(extensions):
+                    continue
+                path = os.path.join(folder, name)
+                if path in known:
+                    continue
+                parts = os.path.splitext(name)[0].split("_")
+                object_name = "_".join(parts[1:-1]) if len(parts) > 2 else ""
+                self.db.execute(
+                    "INSERT INTO media (kind, path, object_name, created_at) VALUES (?, ?, ?, ?)",
+                    (kind, path, object_name, os.path.getmtime(path)))
+                added += 1
+        return added
+
+    def close(self):
+        self.db.close()
+
+
+def shared_catalog(path=CATALOG_PATH):
+    """
+    Returns the process-wide catalog for 'path', opening it on first use. The
+    launcher runs every mode in one process, so the modes share one connection
+    instead of opening another one each time a window is opened.
+    """
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            catalog = _catalogs[path] = DetectionCatalog(path)
+    return catalog
@@ -0,0 +1,214 @@
+import glob
+import json
+import os
+import time
+import cv2
+import numpy as np
+
+# Folder that holds one sub-folder per run
+LOG_FOLDER = "detection_logs"
+
+# Column name -> dtype. One row per detected box.
+COLUMNS = {
+    "frame": np.int64,
+    "time": np.float64,
+    "class_id": np.int16,
+    "confidence": np.float32,
+    "x1": np.float32,
+    "y1": np.float32,
+    "x2": np.float32,
+    "y2": np.float32,
+    "track_id": np.int32,  # -1 when the detector does not track
+}
+
+
+def new_log_folder(source):
+    """
+    Creates and returns a fresh folder under LOG_FOLDER for a run on 'source'.
+    Runs started in the same second (e.g. two camera sessions) get a numbered suffix.
+    """
+    name = "".join(c if c.isalnum() else "_" for c in os.path.basename(str(source))) or "camera"
+    base = os.path.join(LOG_FOLDER, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    folder, number = base, 1
+    while True:
+        try:
+            os.mkdir(folder)  # Fails if another run took this name, even in the same instant
+            return folder
+        except FileExistsError:
+            number += 1
+            folder = f"{base}_{number}"
+
+
+class DetectionLogWriter:
+    """
+    Appends per-frame detections to preallocated column arrays and writes
+    them out as one compressed .npz file per 'chunk_rows' rows, so a long run
+    never holds more than one chunk in memory.
+    """
+
+    def __init__(self, folder, names, source="", chunk_rows=65536):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self.columns = {name: np.empty(chunk_rows, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.rows = 0
+        self.chunks = 0
+        self.frames = 0
+        with open(os.path.join(folder, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"source": str(source), "names": {int(k): v for k, v in dict(names).items()},
+                       "columns": list(COLUMNS), "started": time.time()}, f)
+
+    def append_result(self, frame_id, timestamp, result):
+        """ Adds all boxes of one ultralytics Results object. """
+        self.frames += 1
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return
+        xyxy = boxes.xyxy.cpu().numpy()
+        values = {
+            "frame": frame_id,
+            "time": timestamp,
+            "class_id": boxes.cls.cpu().numpy(),
+            "confidence": boxes.conf.cpu().numpy(),
+            "x1": xyxy[:, 0], "y1": xyxy[:, 1], "x2": xyxy[:, 2], "y2": xyxy[:, 3],
+            "track_id": boxes.id.cpu().numpy() if boxes.id is not None else -1,
+        }
+        count = len(xyxy)
+        start = 0
+        while start < count:
+            take = min(count - start, self.chunk_rows - self.rows)
+            for name, column in self.columns.items():
+                value = values[name]
+                column[self.rows:self.rows + take] = value[start:start + take] if np.ndim(value) else value
+            self.rows += take
+            start += take
+            if self.rows == self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        if self.rows == 0:
+            return
+        path = os.path.join(self.folder, f"chunk_{self.chunks:06d}.npz")
+        np.savez_compressed(path, **{name: column[:self.rows] for name, column in self.columns.items()})
+        self.chunks += 1
+        self.rows = 0
+
+    def close(self):
+        self.flush()
+
+
+class DetectionLog:
+    """ Read side: loads a run's chunks and answers questions without running the model again. """
+
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.names = {int(k): v for k, v in self.meta["names"].items()}
+        self.ids_by_name = {v.lower(): k for k, v in self.names.items()}
+
+        chunks = [np.load(path) for path in sorted(glob.glob(os.path.join(folder, "chunk_*.npz")))]
+        self.columns = {
+            name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else np.empty(0, dtype=dtype)
+            for name, dtype in COLUMNS.items()
+        }
+
+    def __len__(self):
+        return len(self.columns["frame"])
+
+    def _select(self, class_name=None, start=None, end=None, min_confidence=None):
+        keep = np.ones(len(self), dtype=bool)
+        if class_name is not None:
+            keep &= self.columns["class_id"] == self.ids_by_name.get(class_name.lower(), -1)
+        if start is not None:
+            keep &= self.columns["time"] >= start
+        if end is not None:
+            keep &= self.columns["time"] <= end
+        if min_confidence is not None:
+            keep &= self.columns["confidence"] >= min_confidence
+        return keep
+
+    def count(self, class_name=None, start=None, end=None, min_confidence=None):
+        """ Number of detections (boxes) matching the filters. """
+        return int(self._select(class_name, start, end, min_confidence).sum())
+
+    def count_objects(self, class_name=None, start=None, end=None):
+        """ Number of distinct tracked objects (needs a run that used model.track). """
+        keep = self._select(class_name, start, end) & (self.columns["track_id"] >= 0)
+        return len(np.unique(self.columns["track_id"][keep]))
+
+    def counts_by_class(self, start=None, end=None):
+        keep = self._select(start=start, end=end)
+        ids, counts = np.unique(self.columns["class_id"][keep], return_counts=True)
+        return {self.names.get(int(i), str(i)): int(c) for i, c in zip(ids, counts)}
+
+    def frames_with(self, class_name, min_count=1, min_confidence=None):
+        """ Frame ids where at least 'min_count' boxes of the class were detected. """
+        keep = self._select(class_name, min_confidence=min_confidence)
+        frames, counts = np.unique(self.columns["frame"][keep], return_counts=True)
+        return frames[counts >= min_count]
+
+    def timeline(self, class_name=None, bucket_seconds=60):
+        """ (bucket start times, detections per bucket) for plotting activity over time. """
+        times = self.columns["time"][self._select(class_name)]
+        if len(times) == 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        first = times.min()
+        counts = np.bincount(((times - first) // bucket_seconds).astype(np.int64))
+        return first + bucket_seconds * np.arange(len(counts)), counts
+
+    def boxes_for_frame(self, frame_id):
+        """ Rows of one frame as a dict of arrays. """
+        frames = self.columns["frame"]
+        # Frames are appended in order, so a binary search finds them
+        lo, hi = np.searchsorted(frames, frame_id, "left"), np.searchsorted(frames, frame_id, "right")
+        return {name: column[lo:hi] for name, column in self.columns.items()}
+
+    def rerender(self, video_path, output_path, min_confidence=0.0):
+        """ Draws the logged boxes onto the source video (frame ids = frame numbers in the file). """
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        writer = None
+        frame_id = 0
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            if writer is None:
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'mp4v'), fps,
+                                         (frame.shape[1], frame.shape[0]))
+            rows = self.boxes_for_frame(frame_id)
+            for x1, y1, x2, y2, c, p in zip(rows["x1"], rows["y1"], rows["x2"], rows["y2"], rows["class_id"],
+                                            rows["confidence"]):
+                if p < min_confidence:
+                    continue
+                cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+                cv2.putText(frame, f"{self.names.get(int(c), c)} {p:.2f}", (int(x1), max(int(y1) - 5, 10)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            writer.write(frame)
+            frame_id += 1
+        cap.release()
+        if writer is not None:
+            writer.release()
+        return frame_id
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query a detection log without re-running the model.")
+    parser.add_argument("folder", help="a run folder under detection_logs/")
+    parser.add_argument("--class", dest="class_name", help="only this class")
+    parser.add_argument("--rerender", nargs=2, metavar=("VIDEO", "OUT"), help="draw logged boxes onto VIDEO")
+    args = parser.parse_args()
+
+    log = DetectionLog(args.folder)
+    print(f"{len(log)} detections from {log.meta['source']}")
+    print("By class:", log.counts_by_class())
+    if args.class_name:
+        print(f"{args.class_name}: {log.count(args.class_name)} detections, "
+              f"{log.count_objects(args.class_name)} tracked objects, "
+              f"{len(log.frames_with(args.class_name))} frames")
+    if args.rerender:
+        print(f"Rendered {log.rerender(*args.rerender)} frames")
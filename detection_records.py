@@ -0,0 +1,59 @@
+import csv
+import json
+import os
+
+# Column order used for CSV output (JSONL uses the same keys)
+FIELDS = ["source", "frame", "class_id", "class_name", "confidence", "x1", "y1", "x2", "y2", "track_id"]
+
+
+def records_from_result(result, source="", frame=0):
+    """ Converts one ultralytics Results object into a list of plain detection dicts. """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return []
+
+    xyxy = boxes.xyxy.cpu().numpy()
+    cls = boxes.cls.cpu().numpy().astype(int)
+    conf = boxes.conf.cpu().numpy()
+    ids = boxes.id.cpu().numpy().astype(int) if boxes.id is not None else [None] * len(cls)
+
+    records = []
+    for (x1, y1, x2, y2), c, p, track_id in zip(xyxy, cls, conf, ids):
+        records.append({
+            "source": source,
+            "frame": frame,
+            "class_id": int(c),
+            "class_name": result.names[int(c)],
+            "confidence": round(float(p), 4),
+            "x1": round(float(x1), 1), "y1": round(float(y1), 1),
+            "x2": round(float(x2), 1), "y2": round(float(y2), 1),
+            "track_id": None if track_id is None else int(track_id),
+        })
+    return records
+
+
+class DetectionFileWriter:
+    """ Appends detection records to a .jsonl or .csv file as they are produced. """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "a", newline="", encoding="utf-8")
+        if self.format == "csv":
+            self.csv = csv.DictWriter(self.file, fieldnames=FIELDS)
+            if new_file:
+                self.csv.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if self.format == "csv":
+                self.csv.writerow(record)
+            else:
+                self.file.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,172 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import cv2
+import numpy as np
+from model_host import get_model, predict
+from detection_records import records_from_result
+from metrics import Metrics
+
+# Largest image upload accepted (bytes)
+MAX_UPLOAD = 32 * 1024 * 1024
+
+
+class MicroBatcher(threading.Thread):
+    """
+    Collects images from many concurrent requests and runs them through the
+    model together. A batch is sent when it reaches 'max_batch' images or when
+    the oldest waiting image has waited 'max_wait_ms', whichever comes first.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait_ms=10, imgsz=640, conf=0.25, stats=None):
+        super().__init__(daemon=True)
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.imgsz = imgsz
+        self.conf = conf
+        self.stats = stats or Metrics()
+        self.queue = queue.Queue()
+
+    def submit(self, image, conf=None):
+        """ Queues an image; returns a Future with (records, info). """
+        future = Future()
+        self.queue.put((image, max(conf or self.conf, self.conf), future, time.perf_counter()))
+        self.stats.gauge("queue_depth", self.queue.qsize())
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = batch[0][3] + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        try:
+            results = predict(self.model, [image for image, _, _, _ in batch], imgsz=self.imgsz,
+                              conf=self.conf, classes=None)
+        except Exception as e:
+            for _, _, future, _ in batch:
+                future.set_exception(e)
+            return
+        inference_ms = (time.perf_counter() - started) * 1000
+
+        self.stats.count("batches")
+        self.stats.count("images", len(batch))
+        self.stats.gauge("batch_size", len(batch))  # Average batch size: the images / batches counters
+        self.stats.observe("inference", inference_ms)
+        self.stats.gauge("queue_depth", self.queue.qsize())
+        for (_, conf, future, queued_at), result in zip(batch, results):
+            queue_ms = (started - queued_at) * 1000
+            self.stats.observe("queue_wait", queue_ms)
+            self.stats.tick("images")
+            # The batch ran at the service threshold; apply each request's own (higher) threshold
+            records = [r for r in records_from_result(result) if r["confidence"] >= conf]
+            future.set_result((records, {"queue_ms": round(queue_ms, 2), "inference_ms": round(inference_ms, 2),
+                                         "batch_size": len(batch)}))
+
+
+def make_handler(batcher, timeout=30):
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith("/stats"):
+                self.send_json(200, batcher.stats.snapshot())
+            elif self.path.startswith("/health"):
+                self.send_json(200, {"status": "ok"})
+            else:
+                self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/detect":
+                self.send_json(404, {"error": "not found"})
+                return
+            # Bad parameters are the client's mistake (400), not a server error
+            conf = parse_qs(url.query).get("conf", [None])[0]
+            try:
+                conf = float(conf) if conf else None
+            except ValueError:
+                conf = -1.0
+            if conf is not None and not 0.0 <= conf <= 1.0:
+                self.send_json(400, {"error": "conf must be a number between 0 and 1"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = 0  # A malformed header counts as no body
+            if length <= 0 or length > MAX_UPLOAD:
+                self.send_json(400, {"error": "send the image file (JPEG/PNG) as the request body"})
+                return
+
+            # Decoding happens here, in the request's own thread, so it runs in parallel
+            data = np.frombuffer(self.rfile.read(length), dtype=np.uint8)
+            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if image is None:
+                self.send_json(400, {"error": "could not decode image"})
+                return
+
+            try:
+                records, info = batcher.submit(image, conf).result(timeout)
+            except Exception as e:
+                self.send_json(500, {"error": str(e)})
+                return
+            self.send_json(200, {"detections": records, **info})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8600, max_batch=8, max_wait_ms=10, imgsz=640, conf=0.25, backend=None):
+    model = get_model('yolov8n.pt', backend)
+    batcher = MicroBatcher(model, max_batch, max_wait_ms, imgsz, conf)
+    batcher.start()
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    print(f"Detection service on http://{host}:{port}  (POST /detect, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless detection service with request micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=8, help="most images per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="longest an image waits for a batch to fill")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25, help="lowest confidence any request can ask for")
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.imgsz, args.conf, args.backend)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+import queue
+import threading
+import tkinter as tk
+import cv2
+from PIL import Image, ImageTk
+
+
+def mode_window(title, launcher_root=None):
+    """
+    Main window of a detection mode. When the launcher (finalGUI.py) runs the
+    mode it passes its own root as 'launcher_root'; the mode then opens a
+    Toplevel of it, so there is one Tk root and one event loop in the process.
+    Run on its own, the mode gets a new Tk root.
+    """
+    if launcher_root is not None:
+        window = tk.Toplevel(launcher_root)
+    else:
+        window = tk.Tk()
+    window.title(title)
+    return window
+
+
+def run_mode_window(window):
+    """ Runs the event loop for a mode started on its own; under the launcher its loop is already running. """
+    if isinstance(window, tk.Tk):
+        window.mainloop()
+
+
+class Session(threading.Thread):
+    """
+    One detection session (a camera loop, a single image, ...) running in its
+    own thread. The work function is called as target(session) and should:
+      - return soon after session.stopped becomes True,
+      - raise an exception for a failure (shown as "Error: ..." in the session window),
+      - hand frames to the GUI with session.show(frame) (BGR; only the newest one is drawn),
+      - report progress with session.status(text),
+      - read key presses from the session window with session.poll_key().
+    Nothing in here touches Tk; the SessionManager draws everything on the Tk thread.
+    """
+
+    def __init__(self, name, target):
+        super().__init__(daemon=True)
+        self.name = name
+        self.target = target
+        self.stop_event = threading.Event()
+        self.frame_lock = threading.Lock()
+        self.frame = None              # Newest frame not drawn yet
+        self.messages = queue.Queue()  # Status lines for the GUI
+        self.keys = queue.Queue()      # Keys pressed in the session window
+        self.frames_shown = 0
+        self.frames_dropped = 0        # Frames replaced before the GUI drew them
+        self.error = None              # Exception the target raised, if any
+
+    def run(self):
+        try:
+            self.target(self)
+        except Exception as e:
+            self.error = e
+            self.status(f"Error: {e}")
+        else:
+            if not self.stopped:
+                self.status("Finished")
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def show(self, frame):
+        with self.frame_lock:
+            if self.frame is not None:
+                self.frames_dropped += 1
+            self.frame = frame
+
+    def take_frame(self):
+        with self.frame_lock:
+            frame, self.frame = self.frame, None
+        return frame
+
+    def status(self, text):
+        print(f"[{self.name}] {text}")
+        self.messages.put(text)
+
+    def poll_key(self):
+        """ Returns the next key pressed in the session window ('' if none). """
+        try:
+            return self.keys.get_nowait()
+        except queue.Empty:
+            return ""
+
+
+class SessionManager:
+    """
+    Starts sessions and shows each one in its own Tk window with a canvas,
+    a status line and a Stop button. Frames and messages are picked up from
+    the sessions every 'poll_ms' by root.after, so the Tk event loop never
+    waits on a camera or the model and several sessions can run at once.
+    """
+
+    def __init__(self, root, poll_ms=30, display_size=(960, 540)):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.display_size = display_size
+        self.sessions = {}  # Session -> its widgets
+        self.closed = False
+        self.root.after(self.poll_ms, self._poll)
+        self.root.protocol("WM_DELETE_WINDOW", self.shutdown)
+
+    def start(self, name, target):
+        session = Session(name, target)
+        window = tk.Toplevel(self.root)
+        window.title(name)
+        window.configure(bg="black")
+        canvas = tk.Canvas(window, width=self.display_size[0], height=self.display_size[1], bg="black",
+                           highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+        image_item = canvas.create_image(0, 0, anchor=tk.NW)
+        status = tk.Label(window, text="Starting...", font=("Arial", 12), fg="white", bg="black", anchor="w")
+        status.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+        stop_button = tk.Button(window, text="Stop", font=("Arial", 14), bg="red", fg="white",
+                                command=session.stop)
+        stop_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        window.bind("<Key>", lambda e: session.keys.put(e.char))
+        window.protocol("WM_DELETE_WINDOW", lambda: self._close(session))
+
+        self.sessions[session] = {"window": window, "canvas": canvas, "image_item": image_item,
+                                  "status": status, "stop_button": stop_button, "photo": None,
+                                  "ended": False}
+        session.start()
+        return session
+
+    def _close(self, session):
+        session.stop()
+        widgets = self.sessions.pop(session, None)
+        if widgets:
+            widgets["window"].destroy()
+
+    def stop_all(self):
+        for session in list(self.sessions):
+            session.stop()
+
+    def shutdown(self, timeout=5):
+        """ Stops every session and gives each a moment to finish writing, then closes the main window. """
+        self.stop_all()
+        for session in list(self.sessions):
+            session.join(timeout)
+        self.closed = True
+        self.root.destroy()
+
+    def running(self):
+        return [s for s in self.sessions if s.is_alive()]
+
+    def _poll(self):
+        if self.closed:
+            return
+        for session, widgets in list(self.sessions.items()):
+            frame = session.take_frame()
+            if frame is not None:
+                self._draw(widgets, frame)
+                session.frames_shown += 1
+            try:
+                while True:
+                    widgets["status"].config(text=session.messages.get_nowait())
+            except queue.Empty:
+                pass
+            # The last frame stays up after the session ends; the window closes when the user closes it
+            if not widgets["ended"] and not session.is_alive():
+                widgets["ended"] = True
+                widgets["stop_button"].config(text="Close", bg="gray", command=lambda s=session: self._close(s))
+        self.root.after(self.poll_ms, self._poll)
+
+    @staticmethod
+    def _draw(widgets, frame):
+        canvas = widgets["canvas"]
+        width, height = max(canvas.winfo_width(), 1), max(canvas.winfo_height(), 1)
+        # Fit the frame into the canvas, keeping its aspect ratio
+        scale = min(width / frame.shape[1], height / frame.shape[0])
+        size = (max(int(frame.shape[1] * scale), 1), max(int(frame.shape[0] * scale), 1))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        photo = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+        canvas.itemconfig(widgets["image_item"], image=photo)
+        canvas.coords(widgets["image_item"], (width - size[0]) // 2, (height - size[1]) // 2)
+        widgets["photo"] = photo  # Tk only keeps a weak reference
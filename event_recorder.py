@@ -0,0 +1,234 @@
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener
+import cv2
+import numpy as np
+
+
+class EventRecorder:
+    """
+    Records event clips in a separate encoder process, so encoding never
+    competes with the camera loop for the GIL.
+    Frames are copied into a ring of shared-memory slots and only the slot
+    number and capture timestamp are sent to the encoder. The encoder hands a
+    slot back as soon as it has copied the frame out. It writes constant
+    frame rate output at 'fps' by repeating or dropping frames according to
+    their timestamps, so a clip lasts exactly as long as the events it shows,
+    however fast the camera loop ran.
+    A clip runs for at least 'min_clip_s'. After that it keeps going while
+    update() reports the trigger, and ends 'post_roll_s' after the trigger
+    was last seen, or at 'max_clip_s'.
+    """
+
+    def __init__(self, frame_shape, fps=20.0, slots=48, post_roll_s=3.0, min_clip_s=5.0, max_clip_s=300.0,
+                 fourcc="mp4v", start_timeout=20.0):
+        self.shape = tuple(frame_shape)
+        self.fps = fps
+        self.post_roll_s = post_roll_s
+        self.min_clip_s = min_clip_s
+        self.max_clip_s = max_clip_s
+        self.fourcc = fourcc
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(self.shape)))
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.free = list(range(slots))
+        self.path = None
+        self.started = 0.0
+        self.last_trigger = 0.0
+        self.clips = 0
+        self.dropped = 0  # Frames not recorded because every slot was still waiting for the encoder
+
+        # The encoder is started as "python event_recorder.py" rather than with multiprocessing.Process:
+        # with the spawn start method that would re-run the GUI script in the child.
+        # It runs in its own process group, so Ctrl+C in the terminal only reaches this process,
+        # which then closes the clip properly through stop().
+        authkey = secrets.token_bytes(16)
+        listener = Listener(("127.0.0.1", 0), authkey=authkey)
+        host, port = listener.address
+        if os.name == "nt":
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--encoder", f"{host}:{port}",
+                                         authkey.hex(), self.shm.name, "x".join(map(str, self.shape)), str(slots)],
+                                        **group)
+        try:
+            self.conn = _accept(listener, authkey, self.process, start_timeout)
+        except Exception:
+            self.process.kill()
+            del self.frames
+            self.shm.close()
+            self.shm.unlink()
+            raise
+        finally:
+            listener.close()
+
+    @property
+    def recording(self):
+        return self.path is not None
+
+    def _reclaim(self, timeout=0.0):
+        if self.conn.poll(timeout):
+            while self.conn.poll():
+                self.free.append(self.conn.recv())
+
+    def free_slots(self):
+        """ How many frames write() can take right now without waiting or dropping. """
+        self._reclaim()
+        return len(self.free)
+
+    def start(self, path, timestamp, preroll=()):
+        """ Opens a clip at 'path'; 'preroll' is (timestamp, frame) pairs from before 'timestamp'. """
+        if self.recording:
+            self.close_clip()
+        height, width = self.shape[:2]
+        self.conn.send(("open", path, self.fourcc, self.fps, (width, height)))
+        self.path = path
+        self.started = self.last_trigger = timestamp
+        self.clips += 1
+        for frame_time, frame in preroll:
+            self.write(frame, frame_time, block=True)
+
+    def write(self, frame, timestamp, block=False):
+        """ Queues a frame taken at 'timestamp' (time.time()). Returns False if it had to be dropped. """
+        if not self.recording:
+            return False
+        self._reclaim()
+        while not self.free and block and self.process.poll() is None:
+            self._reclaim(0.1)
+        if not self.free:
+            self.dropped += 1
+            return False
+        slot = self.free.pop()
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.shape[1], self.shape[0]))
+        np.copyto(self.frames[slot], frame)
+        self.conn.send(("frame", slot, timestamp))
+        return True
+
+    def update(self, triggered, timestamp):
+        """ Call once per frame with whether the trigger holds; returns the clip's path when it ends, else None. """
+        if not self.recording:
+            return None
+        if triggered:
+            self.last_trigger = timestamp
+        length = timestamp - self.started
+        if length >= self.max_clip_s or (length >= self.min_clip_s and timestamp - self.last_trigger >= self.post_roll_s):
+            path = self.path
+            self.close_clip()
+            return path
+        return None
+
+    def close_clip(self):
+        if self.recording:
+            self.conn.send(("close",))
+            self.path = None
+
+    def stop(self, timeout=10):
+        """ Finishes the current clip, waits for the encoder and frees the shared memory. """
+        self.close_clip()
+        try:
+            self.conn.send(("stop",))
+            self.process.wait(timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.conn.close()
+        del self.frames
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _accept(listener, authkey, process, timeout):
+    """ listener.accept() that gives up after 'timeout' seconds, or as soon as 'process' exits without connecting. """
+    accepted = []
+    thread = threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and time.monotonic() < deadline and process.poll() is None:
+        thread.join(0.1)
+    if thread.is_alive():
+        # accept() cannot be interrupted; connecting to it ourselves lets the thread finish
+        try:
+            Client(listener.address, authkey=authkey).close()
+        except OSError:
+            pass
+        thread.join(1.0)
+        if accepted:
+            accepted.pop().close()
+    if not accepted:
+        raise RuntimeError(f"Encoder process did not connect within {timeout:g} s (exit code {process.poll()})")
+    return accepted[0]
+
+
+def run_encoder(address, authkey, shm_name, shape, slots):
+    """ Encoder process: turns (slot, timestamp) messages into constant frame rate video files. """
+    # Ctrl+C is for the recording process; it ends clips with "close" / "stop" messages
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    if os.name == "posix":
+        # The recording process owns the memory; keep this process's tracker from removing it
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=shm.buf)
+    conn = Client(address, authkey=authkey)
+
+    writer = None
+    pending = None    # Newest frame not written yet
+    next_time = 0.0   # Capture time the next output frame stands for
+    period = 1.0
+
+    def finish():
+        nonlocal writer, pending
+        if writer is not None:
+            if pending is not None:
+                writer.write(pending)
+            writer.release()
+        writer, pending = None, None
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break  # The recording process is gone; keep what was written
+        if message[0] == "frame":
+            _, slot, timestamp = message
+            frame = frames[slot].copy()
+            conn.send(slot)
+            if writer is None:
+                continue
+            if pending is None:
+                next_time = timestamp
+            else:
+                # Each output frame shows the newest frame captured at or before its time:
+                # a slow loop repeats frames, a fast one has frames replaced before they are written
+                while next_time < timestamp:
+                    writer.write(pending)
+                    next_time += period
+            pending = frame
+        elif message[0] == "open":
+            finish()
+            _, path, fourcc, fps, size = message
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+            period = 1.0 / fps
+        elif message[0] == "close":
+            finish()
+        elif message[0] == "stop":
+            break
+    finish()
+    conn.close()
+    del frames
+    shm.close()
+
+
+if __name__ == "__main__" and len(sys.argv) == 7 and sys.argv[1] == "--encoder":
+    host, port = sys.argv[2].rsplit(":", 1)
+    run_encoder((host, int(port)), bytes.fromhex(sys.argv[3]), sys.argv[4],
+                tuple(int(v) for v in sys.argv[5].split("x")), int(sys.argv[6]))
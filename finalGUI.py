@@ -1,6 +1,7 @@
 import tkinter as tk
 from PIL import Image, ImageTk
-import subprocess
+import runpy
+import model_host
 
 # Create the main application window
 root = tk.Tk()
@@ -43,10 +44,14 @@ def on_enter(e):
 def on_leave(e):
     e.widget.config(bg="#0077B6", relief="flat", fg="white")    # Revert style when not hovering
 
-# Function to run a separate Python script when a button is clicked
+# Function to run a mode's script inside this process when a button is clicked,
+# so every mode reuses the model that model_host already loaded
 def run_script(script_name):
     try:
-        subprocess.run(["python", script_name], check=True)  # Safely run script
+        # The mode opens its window as a Toplevel of this one (see detection_sessions.mode_window)
+        runpy.run_path(script_name, init_globals={"launcher_root": root}, run_name="__main__")
+    except SystemExit:
+        pass                                                  # Scripts may call exit() when closed
     except Exception as e:
         print(f"Error running {script_name}: {e}")            # Print any errors to the console
 
@@ -97,6 +102,9 @@ def slide_in(index=0):
 # Start button animation slightly after window loads
 root.after(500, slide_in)
 
+# Load and warm up the shared YOLO model while the menu is on screen
+model_host.prewarm_in_background('yolov8n.pt')
+
 # Create "About The App" hyperlink-like label at the bottom center
 about_label = tk.Label(
     root, 
@@ -0,0 +1,121 @@
+import os
+import time
+import cv2
+import numpy as np
+
+# Camera used by the live modes; set e.g. CAMERA_SOURCE=clip.mp4 or CAMERA_SOURCE=synthetic
+# to run them (or the benchmark) without a webcam
+CAMERA_SOURCE = os.environ.get("CAMERA_SOURCE", "0")
+
+
+class SyntheticSource:
+    """
+    Camera stand-in that generates frames: a noisy background with a few
+    moving rectangles. Reproducible for a given seed. With 'fps' set, read()
+    is paced like a real camera; 'frames' limits how many frames it delivers.
+    """
+
+    def __init__(self, width=640, height=480, fps=None, frames=None, seed=0):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames = frames
+        self.random = np.random.default_rng(seed)
+        self.background = self.random.integers(0, 60, (height, width, 3), dtype=np.uint8)
+        self.objects = [(self.random.integers(0, width), self.random.integers(0, height),
+                         self.random.integers(-8, 9), self.random.integers(-8, 9),
+                         tuple(int(c) for c in self.random.integers(80, 256, 3))) for _ in range(3)]
+        self.count = 0
+        self.next_time = None
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+        if self.fps:
+            now = time.perf_counter()
+            if self.next_time is not None and now < self.next_time:
+                time.sleep(self.next_time - now)
+            self.next_time = max(now, self.next_time or now) + 1.0 / self.fps
+
+        frame = self.background.copy()
+        for x, y, dx, dy, color in self.objects:
+            cx = int((x + dx * self.count) % self.width)
+            cy = int((y + dy * self.count) % self.height)
+            cv2.rectangle(frame, (cx, cy), (cx + 80, cy + 120), color, -1)
+        self.count += 1
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps or 30)
+        return 0.0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class FileSource:
+    """
+    Camera stand-in backed by a recorded video file. Loops at the end by default;
+    with realtime=True frames are delivered at the file's frame rate.
+    """
+
+    def __init__(self, path, loop=True, realtime=False):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f"Unable to open video {path}")
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.realtime = realtime
+        self.next_time = None
+
+    def read(self):
+        if self.realtime:
+            now = time.perf_counter()
+            if self.next_time is not None and now < self.next_time:
+                time.sleep(self.next_time - now)
+            self.next_time = max(now, self.next_time or now) + 1.0 / self.fps
+
+        success, frame = self.capture.read()
+        if not success and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.capture.read()
+        return success, frame
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+
+def open_source(spec=None, realtime=True):
+    """
+    Opens a frame source from a description:
+      0, "1"           -> webcam device index
+      "synthetic"      -> SyntheticSource (optionally "synthetic:1280x720")
+      a video file     -> FileSource (looped, paced like a camera when realtime=True)
+      anything else    -> passed to cv2.VideoCapture (e.g. an RTSP URL)
+    """
+    spec = CAMERA_SOURCE if spec is None else spec
+    if isinstance(spec, int) or str(spec).isdigit():
+        return cv2.VideoCapture(int(spec))
+    if str(spec).startswith("synthetic"):
+        width, height = 640, 480
+        if ":" in spec:
+            width, height = (int(v) for v in spec.split(":", 1)[1].lower().split("x"))
+        return SyntheticSource(width, height, fps=30 if realtime else None)
+    if os.path.isfile(spec):
+        return FileSource(spec, realtime=realtime)
+    return cv2.VideoCapture(spec)
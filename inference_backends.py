@@ -0,0 +1,186 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import numpy as np
+
+# Folder holding exported / quantized models so they are only built once
+EXPORT_FOLDER = "exported_models"
+
+# Available backends. Every one of them is loaded back through ultralytics' YOLO(),
+# so callers get the same Results objects (boxes, names, plot()) as with PyTorch.
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino", "openvino-int8")
+
+# Dataset used to calibrate OpenVINO int8 quantization
+INT8_CALIBRATION_DATA = "coco8.yaml"
+
+# ultralytics exports to a fixed path next to the weights, so two sessions starting at the
+# same time would export over each other; exports run one at a time (reentrant: int8 ONNX
+# exports the fp32 model first)
+_export_lock = threading.RLock()
+
+
+def exported_path(weights, backend):
+    name = os.path.splitext(os.path.basename(weights))[0]
+    if backend.startswith("onnx"):
+        return os.path.join(EXPORT_FOLDER, f"{name}_{backend.replace('-', '_')}.onnx")
+    # ultralytics only recognises OpenVINO model folders whose name ends in "_openvino_model"
+    suffix = "_int8" if backend.endswith("int8") else ""
+    return os.path.join(EXPORT_FOLDER, f"{name}{suffix}_openvino_model")
+
+
+def export_model(weights, backend):
+    """
+    Returns the path of 'weights' exported for 'backend', exporting it on first use.
+    ONNX int8 uses onnxruntime dynamic (weight-only) quantization, OpenVINO int8 uses
+    NNCF post-training quantization calibrated on INT8_CALIBRATION_DATA.
+    """
+    if backend == "torch":
+        return weights
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    target = exported_path(weights, backend)
+    if os.path.exists(target):
+        return target
+    with _export_lock:
+        if os.path.exists(target):
+            return target  # Exported by the thread that held the lock before us
+        os.makedirs(EXPORT_FOLDER, exist_ok=True)
+
+        from ultralytics import YOLO
+        if backend == "onnx":
+            exported = YOLO(weights).export(format="onnx", dynamic=True, simplify=True)
+            shutil.move(exported, target)
+        elif backend == "onnx-int8":
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            # Written under a temporary name, so an interrupted quantization never looks finished
+            temp = target + ".tmp"
+            quantize_dynamic(export_model(weights, "onnx"), temp, weight_type=QuantType.QUInt8)
+            os.replace(temp, target)
+        elif backend == "openvino":
+            exported = YOLO(weights).export(format="openvino", dynamic=True)
+            shutil.move(exported, target)
+        elif backend == "openvino-int8":
+            # Dynamic shapes like the fp32 export, so the adaptive controller can change the inference size
+            exported = YOLO(weights).export(format="openvino", int8=True, dynamic=True, data=INT8_CALIBRATION_DATA)
+            shutil.move(exported, target)
+        print(f"Exported {weights} for {backend}: {target}")
+        return target
+
+
+def load_model(weights, backend="torch"):
+    """ Loads 'weights' for the given backend (exporting it if needed). """
+    from ultralytics import YOLO
+    return YOLO(export_model(weights, backend), task="detect")
+
+
+def box_iou(a, b):
+    """ IoU matrix between two sets of xyxy boxes. """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_boxes(reference, candidate, iou_threshold=0.5):
+    """ Counts candidate boxes that match a reference box of the same class (greedy, by IoU). """
+    ref_xyxy, ref_cls = reference
+    cand_xyxy, cand_cls = candidate
+    iou = box_iou(ref_xyxy, cand_xyxy)
+    iou[ref_cls[:, None] != cand_cls[None, :]] = 0
+    matched = 0
+    while iou.size and iou.max() >= iou_threshold:
+        i, j = np.unravel_index(iou.argmax(), iou.shape)
+        iou[i, :] = 0
+        iou[:, j] = 0
+        matched += 1
+    return matched
+
+
+def compare_backends(images, weights="yolov8n.pt", backends=BACKENDS, imgsz=640, conf=0.25, runs=3):
+    """
+    Runs every backend over the same images and reports speed and agreement with
+    the PyTorch model: recall / precision of its boxes against the PyTorch boxes
+    (same class, IoU >= 0.5).
+    """
+    def boxes_of(result):
+        return result.boxes.xyxy.cpu().numpy(), result.boxes.cls.cpu().numpy().astype(int)
+
+    reference_model = load_model(weights, "torch")
+    reference = [boxes_of(reference_model(image, imgsz=imgsz, conf=conf, verbose=False)[0]) for image in images]
+
+    report = []
+    for backend in backends:
+        model = load_model(weights, backend)
+        model(images[0], imgsz=imgsz, conf=conf, verbose=False)  # Warm-up
+
+        latencies, outputs = [], []
+        for _ in range(runs):
+            outputs = []
+            for image in images:
+                start = time.perf_counter()
+                result = model(image, imgsz=imgsz, conf=conf, verbose=False)[0]
+                latencies.append(time.perf_counter() - start)
+                outputs.append(boxes_of(result))
+
+        matched = sum(match_boxes(ref, out) for ref, out in zip(reference, outputs))
+        ref_total = sum(len(ref[1]) for ref in reference)
+        out_total = sum(len(out[1]) for out in outputs)
+        latencies_ms = np.array(latencies) * 1000
+        report.append({
+            "backend": backend,
+            "mean_ms": round(float(latencies_ms.mean()), 2),
+            "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+            "fps": round(1000 / float(latencies_ms.mean()), 1),
+            "boxes": out_total,
+            "recall_vs_torch": round(matched / ref_total, 3) if ref_total else 1.0,
+            "precision_vs_torch": round(matched / out_total, 3) if out_total else 1.0,
+            "artifact": export_model(weights, backend),
+        })
+    return report
+
+
+def main(argv=None):
+    import cv2
+
+    parser = argparse.ArgumentParser(description="Export the model for CPU runtimes and compare accuracy vs speed.")
+    parser.add_argument("images", help="folder or glob of test images")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--limit", type=int, default=50, help="most images to use")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    pattern = os.path.join(args.images, "*") if os.path.isdir(args.images) else args.images
+    paths = [p for p in sorted(glob.glob(pattern)) if p.lower().endswith((".jpg", ".jpeg", ".png"))][:args.limit]
+    images = [image for image in (cv2.imread(p) for p in paths) if image is not None]
+    if not images:
+        print("No images found")
+        return 1
+
+    report = compare_backends(images, args.weights, args.backends, args.imgsz, args.conf)
+    print(f"{'backend':<15}{'mean ms':>10}{'p95 ms':>10}{'fps':>8}{'recall':>9}{'precision':>11}")
+    for row in report:
+        print(f"{row['backend']:<15}{row['mean_ms']:>10}{row['p95_ms']:>10}{row['fps']:>8}"
+              f"{row['recall_vs_torch']:>9}{row['precision_vs_torch']:>11}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
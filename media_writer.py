@@ -0,0 +1,157 @@
+import collections
+import threading
+import time
+import cv2
+
+# What to do with a new screenshot / video frame when the queue is full
+BLOCK = "block"              # Wait for room (backpressure on the caller)
+DROP_NEWEST = "drop_newest"  # Discard the item being submitted
+DROP_OLDEST = "drop_oldest"  # Discard the oldest waiting screenshot / frame
+
+
+class MediaWriter(threading.Thread):
+    """
+    Background thread that owns all screenshot and video encoding, so JPEG
+    encoding and disk flushes never run on the detection loop.
+    Opening and closing videos is never dropped; the drop policy only applies
+    to screenshots and video frames.
+    """
+
+    def __init__(self, max_queue=64, policy=BLOCK):
+        super().__init__(daemon=True)
+        self.max_queue = max_queue
+        self.policy = policy
+        self.items = collections.deque()  # (kind, enqueue time, args)
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.videos = {}
+
+        # Counters
+        self.submitted = 0
+        self.handled = 0  # Every item the thread took off the queue, control items included
+        self.written = 0  # Screenshots and video frames that actually reached the encoder
+        self.dropped = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_write_s = 0.0
+        self.max_write_s = 0.0
+        self.total_wait_s = 0.0
+
+    # ---- Called from the detection loop ----
+
+    def save_image(self, path, frame, on_done=None):
+        """ Queues a screenshot; on_done(path, ok) is called from the writer thread. """
+        self._submit("image", (path, frame, on_done), droppable=True)
+
+    def open_video(self, key, path, fourcc, fps, size):
+        self._submit("open", (key, path, fourcc, fps, size), droppable=False)
+
+    def write_frame(self, key, frame):
+        self._submit("frame", (key, frame), droppable=True)
+
+    def close_video(self, key):
+        self._submit("close", (key,), droppable=False)
+
+    def _submit(self, kind, args, droppable):
+        with self.condition:
+            self.submitted += 1
+            if droppable and len(self.items) >= self.max_queue:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                if self.policy == DROP_OLDEST and self._drop_oldest():
+                    self.dropped += 1
+            # Wait for room (also used for control items and when nothing could be dropped)
+            while len(self.items) >= self.max_queue and not self.stopping:
+                self.condition.wait()
+            self.items.append((kind, time.perf_counter(), args))
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+
+    def _drop_oldest(self):
+        for i, (kind, _, _) in enumerate(self.items):
+            if kind in ("image", "frame"):
+                del self.items[i]
+                return True
+        return False
+
+    # ---- Writer thread ----
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.items and not self.stopping:
+                    self.condition.wait()
+                if not self.items:
+                    break
+                kind, queued_at, args = self.items.popleft()
+                self.condition.notify_all()
+
+            started = time.perf_counter()
+            self.total_wait_s += started - queued_at
+            try:
+                if self._handle(kind, args):
+                    self.written += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Media writer error ({kind}): {e}")
+            duration = time.perf_counter() - started
+            self.handled += 1
+            self.total_write_s += duration
+            self.max_write_s = max(self.max_write_s, duration)
+
+        # Never leave a half-written video open
+        for writer in self.videos.values():
+            writer.release()
+        self.videos.clear()
+
+    def _handle(self, kind, args):
+        """ Handles one queued item; returns True if a screenshot or video frame was written. """
+        if kind == "image":
+            path, frame, on_done = args
+            ok = cv2.imwrite(path, frame)
+            if not ok:
+                self.failed += 1
+            if on_done:
+                on_done(path, ok)
+            return ok
+        elif kind == "open":
+            key, path, fourcc, fps, size = args
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+            if writer.isOpened():
+                self.videos[key] = writer
+            else:
+                self.failed += 1
+                print(f"Media writer could not open {path}")
+        elif kind == "frame":
+            key, frame = args
+            writer = self.videos.get(key)
+            if writer is not None:
+                writer.write(frame)
+                return True
+        elif kind == "close":
+            writer = self.videos.pop(args[0], None)
+            if writer is not None:
+                writer.release()
+        return False
+
+    def stop(self, timeout=10):
+        """ Finishes everything already queued, then stops the thread. """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.join(timeout)
+
+    def stats(self):
+        done = max(self.handled, 1)
+        return {
+            "queue_depth": len(self.items),
+            "max_queue_depth": self.max_depth,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "avg_write_ms": round(1000 * self.total_write_s / done, 2),
+            "max_write_ms": round(1000 * self.max_write_s, 2),
+            "avg_queue_wait_ms": round(1000 * self.total_wait_s / done, 2),
+        }
@@ -0,0 +1,198 @@
+import collections
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+
+# Optional exports, e.g. METRICS_PORT=9100 (HTTP /metrics and /metrics.json)
+# or METRICS_DUMP=metrics.json (file rewritten every few seconds)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_DUMP = os.environ.get("METRICS_DUMP", "")
+
+
+class Metrics:
+    """
+    Thread-safe registry the live loops report into:
+      count(name)          - ever-increasing counters (frames, drops, saves)
+      gauge(name, value)   - current values (queue depth)
+      observe(name, ms)    - timings, kept in a rolling window for percentiles
+      tick(name)           - events per second over the last few seconds (FPS)
+    """
+
+    def __init__(self, window=300, rate_seconds=2.0):
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(int)
+        self.gauges = {}
+        self.timings = collections.defaultdict(lambda: collections.deque(maxlen=window))
+        self.ticks = collections.defaultdict(collections.deque)
+        self.rate_seconds = rate_seconds
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name, milliseconds):
+        with self.lock:
+            self.timings[name].append(milliseconds)
+
+    def tick(self, name):
+        now = time.perf_counter()
+        with self.lock:
+            ticks = self.ticks[name]
+            ticks.append(now)
+            while ticks and now - ticks[0] > self.rate_seconds:
+                ticks.popleft()
+
+    def rate(self, name):
+        with self.lock:
+            return self._rate(name)
+
+    def _rate(self, name):
+        ticks = self.ticks.get(name)
+        if not ticks or len(ticks) < 2:
+            return 0.0
+        span = max(ticks[-1] - ticks[0], time.perf_counter() - ticks[-1])
+        return (len(ticks) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        with self.lock:
+            timings = {}
+            for name, values in self.timings.items():
+                if values:
+                    array = np.array(values)
+                    timings[name] = {
+                        "p50": round(float(np.percentile(array, 50)), 2),
+                        "p95": round(float(np.percentile(array, 95)), 2),
+                        "p99": round(float(np.percentile(array, 99)), 2),
+                        "last": round(float(array[-1]), 2),
+                    }
+            return {
+                "time": time.time(),
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timings_ms": timings,
+                "rates_per_s": {name: round(self._rate(name), 2) for name in self.ticks},
+            }
+
+    def prometheus_text(self):
+        """ The snapshot in Prometheus text exposition format. """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in snapshot["counters"].items():
+            lines += [f"# TYPE detector_{name}_total counter", f"detector_{name}_total {value}"]
+        for name, value in snapshot["gauges"].items():
+            lines += [f"# TYPE detector_{name} gauge", f"detector_{name} {value}"]
+        for name, value in snapshot["rates_per_s"].items():
+            lines += [f"# TYPE detector_{name}_per_second gauge", f"detector_{name}_per_second {value}"]
+        for name, stats in snapshot["timings_ms"].items():
+            lines.append(f"# TYPE detector_{name}_ms summary")
+            for quantile in ("p50", "p95", "p99"):
+                lines.append(f'detector_{name}_ms{{quantile="0.{quantile[1:]}"}} {stats[quantile]}')
+        return "\n".join(lines) + "\n"
+
+
+# Registry shared by every detection loop in this process
+registry = Metrics()
+
+
+def draw_hud(frame, metrics=registry, origin=(10, 70)):
+    """ Draws FPS, inference latency, queue depths and drop counts in a box on the frame. """
+    snapshot = metrics.snapshot()
+    lines = [f"{name}: {value:.1f}/s" for name, value in snapshot["rates_per_s"].items()]
+    lines += [f"{name}: {stats['last']:.1f} ms (p95 {stats['p95']:.1f})" for name, stats in snapshot["timings_ms"].items()]
+    lines += [f"{name}: {value}" for name, value in snapshot["gauges"].items()]
+    lines += [f"{name}: {value}" for name, value in snapshot["counters"].items() if "drop" in name or "skip" in name]
+    if not lines:
+        return frame
+
+    x, y = origin
+    height = 22 * len(lines) + 10
+    width = 12 + 9 * max(len(line) for line in lines)
+    region = frame[y:y + height, x:x + width]
+    # Darken the area behind the text so it stays readable on bright scenes
+    region[:] = (region * 0.4).astype(region.dtype)
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (x + 6, y + 20 + 22 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    return frame
+
+
+class MetricsServer(threading.Thread):
+    """ Serves /metrics (Prometheus text) and /metrics.json on localhost. """
+
+    def __init__(self, metrics=registry, port=9100, host="127.0.0.1"):
+        super().__init__(daemon=True)
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = json.dumps(metrics_ref.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = metrics_ref.prometheus_text().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Keep the console for the detection messages
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class JsonDumper(threading.Thread):
+    """ Rewrites 'path' with a metrics snapshot every 'interval' seconds. """
+
+    def __init__(self, path, metrics=registry, interval=5.0):
+        super().__init__(daemon=True)
+        self.path = path
+        self.metrics = metrics
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.metrics.snapshot(), f, indent=2)
+        os.replace(temp_path, self.path)  # Readers never see a half-written file
+
+    def stop(self):
+        self.stop_event.set()
+        self.dump()
+
+
+_exporters_started = False
+
+
+def start_exporters():
+    """ Starts the HTTP endpoint / JSON dump configured by METRICS_PORT / METRICS_DUMP (once per process). """
+    global _exporters_started
+    if _exporters_started:
+        return
+    _exporters_started = True
+    if METRICS_PORT:
+        MetricsServer(registry, METRICS_PORT).start()
+        print(f"Metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
+    if METRICS_DUMP:
+        JsonDumper(METRICS_DUMP).start()
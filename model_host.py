@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+import numpy as np
+
+# Loaded models, shared by every detection mode running in this process
+_models = {}
+_lock = threading.Lock()
+
+# Held around each call on a shared model when several threads (GUI sessions) use it;
+# an ultralytics predictor keeps per-call state and is not safe to run concurrently
+inference_lock = threading.RLock()
+
+DEFAULT_WEIGHTS = 'yolov8n.pt'
+
+# Settings an ultralytics predictor keeps from one call to the next. predict() and track()
+# pass every one of them, so one mode's size / threshold / class filter never carries over
+# into another mode that shares the model
+PREDICT_DEFAULTS = {"imgsz": 640, "conf": 0.25, "iou": 0.7, "classes": None, "verbose": False}
+
+# Inference backend used when a mode does not ask for one (see inference_backends.py),
+# e.g. DETECTION_BACKEND=openvino-int8 python finalGUI.py
+DEFAULT_BACKEND = os.environ.get("DETECTION_BACKEND", "torch")
+
+
+def get_model(weights=DEFAULT_WEIGHTS, backend=None):
+    """ Returns the shared YOLO model for 'weights' on 'backend', loading (and exporting) it on first use. """
+    backend = backend or DEFAULT_BACKEND
+    with _lock:
+        model = _models.get((weights, backend))
+        if model is None:
+            # Imported here so the launcher window opens before torch is loaded
+            from inference_backends import load_model
+            model = load_model(weights, backend)
+            _models[(weights, backend)] = model
+    return model
+
+
+def get_tracker_model(weights=DEFAULT_WEIGHTS, backend=None):
+    """
+    Returns a new model instance for tracking. model.track() registers tracker
+    callbacks on the model that also run on every later plain call, and keeps
+    the track state on its predictor, so each tracking loop gets its own model
+    instead of the shared one.
+    """
+    from inference_backends import load_model
+    return load_model(weights, backend or DEFAULT_BACKEND)
+
+
+def predict(model, source, **settings):
+    """ model(source) with every sticky setting given explicitly (PREDICT_DEFAULTS, overridden by 'settings'). """
+    return model(source, **{**PREDICT_DEFAULTS, **settings})
+
+
+def track(model, source, **settings):
+    """ model.track(source, persist=True) on a model from get_tracker_model(), with every setting given explicitly. """
+    return model.track(source, **{**PREDICT_DEFAULTS, "persist": True, **settings})
+
+
+def prewarm(weights=DEFAULT_WEIGHTS, imgsz=640, backend=None):
+    """ Loads the model and runs one dummy inference so the first real frame is fast. """
+    model = get_model(weights, backend)
+    # A mode may already be running its first detection on the same model
+    with inference_lock:
+        predict(model, np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz)
+    return model
+
+
+def prewarm_in_background(weights=DEFAULT_WEIGHTS, imgsz=640, backend=None):
+    """ Starts prewarm() in a daemon thread and returns the thread. """
+    thread = threading.Thread(target=prewarm, args=(weights, imgsz, backend), daemon=True)
+    thread.start()
+    return thread
+
+
+def measure_first_detection(weights=DEFAULT_WEIGHTS, image=None, imgsz=640, backend=None):
+    """
+    Times how long it takes to get detections for one image.
+    'cold' includes importing ultralytics and loading the weights (when not
+    already done in this process), 'warm' is a second call on the loaded model.
+    """
+    if image is None:
+        image = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+
+    start = time.perf_counter()
+    model = get_model(weights, backend)
+    loaded = time.perf_counter()
+    predict(model, image, imgsz=imgsz)
+    cold = time.perf_counter()
+    predict(model, image, imgsz=imgsz)
+    warm = time.perf_counter()
+
+    return {
+        "load_s": loaded - start,
+        "cold_first_detection_s": cold - start,
+        "warm_first_detection_s": warm - cold,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import cv2
+
+    parser = argparse.ArgumentParser(description="Measure cold and warm time-to-first-detection.")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--image", help="image to detect on (default: blank frame)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--backend", default=None, help="torch, onnx, onnx-int8, openvino or openvino-int8")
+    args = parser.parse_args()
+
+    image = cv2.imread(args.image) if args.image else None
+    print(json.dumps(measure_first_detection(args.weights, image, args.imgsz, args.backend), indent=2))
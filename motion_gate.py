@@ -0,0 +1,68 @@
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap scene-change check run before the detector. Frames are shrunk to
+    'width' pixels wide, converted to gray and compared with the frame that
+    last went through the model (method="diff"), or fed to a MOG2 background
+    subtractor (method="mog2"). The model only runs when at least
+    'sensitivity' (a fraction of the pixels) changed, or when 'max_skip'
+    frames in a row have been skipped, so slow changes are still picked up.
+    """
+
+    def __init__(self, sensitivity=0.005, max_skip=30, pixel_threshold=25, width=160, method="diff"):
+        self.sensitivity = sensitivity
+        self.max_skip = max_skip
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.method = method
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == "mog2" else None
+        self.reference = None
+        self.skipped_in_row = 0
+        self.frames = 0
+        self.skipped = 0
+        self.last_change = 0.0
+
+    def _small_gray(self, frame):
+        height = max(1, frame.shape[0] * self.width // frame.shape[1])
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def should_run(self, frame):
+        """ Returns True if the detector should run on this frame. """
+        self.frames += 1
+        small = self._small_gray(frame)
+
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(small)
+            self.last_change = cv2.countNonZero(mask) / mask.size
+        elif self.reference is None or self.reference.shape != small.shape:
+            self.last_change = 1.0
+        else:
+            diff = cv2.absdiff(small, self.reference)
+            _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            self.last_change = cv2.countNonZero(mask) / mask.size
+
+        if self.last_change >= self.sensitivity or self.skipped_in_row >= self.max_skip:
+            self.reference = small
+            self.skipped_in_row = 0
+            return True
+        self.skipped_in_row += 1
+        self.skipped += 1
+        return False
+
+    @property
+    def skip_fraction(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+
+def reuse_results(results, frame):
+    """
+    Copies of the previous frame's results on the new frame, so plot() draws the old
+    boxes on it. The copies share the boxes; the given results are left as they are,
+    since other code (the tracker, the screenshot selector) may still hold them.
+    """
+    return [type(result)(orig_img=frame, path=result.path, names=result.names,
+                         boxes=result.boxes.data if result.boxes is not None else None)
+            for result in results]
@@ -0,0 +1,320 @@
+import argparse
+import collections
+import math
+import os
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+import metrics
+from camera_pipeline import CaptureThread, DropOldestQueue
+from detection_catalog import shared_catalog
+from detection_records import records_from_result
+from event_recorder import EventRecorder
+from frame_sources import open_source
+from model_host import get_model, predict
+from preroll_buffer import PrerollBuffer
+from renderer import LeanRenderer
+from trigger_rules import TriggerRule
+
+# Where clips from multi-camera mode are saved (listed by the viewer through the catalog)
+VIDEO_FOLDER = "saved_video"
+
+# Size of one camera's cell in the display grid
+CELL_SIZE = (480, 270)
+
+# Most live frames a camera keeps waiting for free encoder slots while its pre-roll is still being sent,
+# and the most frames sent to its encoder per tick (pre-roll frames are decoded as they are sent)
+RECORD_BACKLOG = 120
+RECORD_FEED_PER_TICK = 8
+
+
+class Stream:
+    """
+    One camera in multi-camera mode: its capture thread, its newest frame,
+    its trigger rule and (when recording) its pre-roll buffer and clip recorder.
+    """
+
+    def __init__(self, index, spec, rule, record=False, preroll_seconds=3.0, preroll_max_bytes=8 * 1024 * 1024):
+        self.index = index
+        self.spec = spec
+        self.name = f"cam{index}"
+        self.source = open_source(spec)
+        self.latest = DropOldestQueue(1)  # Only the newest frame waits for the next batch
+        self.capture = CaptureThread(self.source, self.latest)
+        self.rule = rule
+        self.record = record
+        # The pre-roll JPEG-encodes frames in its own thread, so the batch loop only hands them over
+        self.preroll = PrerollBuffer(preroll_seconds, preroll_max_bytes, background=True) if record else None
+        # Each recorder owns an encoder process. It is started in a helper thread on the camera's
+        # first frame (which gives the frame size), so the spawn never holds up the other cameras.
+        self.recorder = None
+        self.recorder_thread = None
+        # Frames waiting for free encoder slots: the pre-roll (decoded as it is sent), then live frames
+        self.preroll_frames = None
+        self.backlog = collections.deque()
+        self.renderer = LeanRenderer(CELL_SIZE, rule.classes if rule else None)
+        self.view = None
+        self.processed = 0
+        self.triggers = 0
+
+    def finished(self):
+        return self.latest.closed and len(self.latest) == 0
+
+    def release(self):
+        """ Stops the pre-roll thread and releases the source (only once the capture thread has ended). """
+        if self.preroll:
+            self.preroll.stop()
+        self.source.release()
+
+    def start_recorder(self, frame_shape):
+        def create():
+            try:
+                self.recorder = EventRecorder(frame_shape)
+            except Exception as e:
+                print(f"[{self.name}] recording disabled, encoder did not start: {e}")
+                self.record = False
+        self.recorder_thread = threading.Thread(target=create, daemon=True)
+        self.recorder_thread.start()
+
+    def feed_recorder(self, block=False):
+        """
+        Sends waiting pre-roll and live frames to the recorder, oldest first. Without
+        'block' it sends at most RECORD_FEED_PER_TICK and stops when every encoder
+        slot is taken, instead of waiting for the encoder.
+        """
+        sent = 0
+        while block or (sent < RECORD_FEED_PER_TICK and self.recorder.free_slots()):
+            if self.preroll_frames is not None:
+                item = next(self.preroll_frames, None)
+                if item is None:
+                    self.preroll_frames = None
+                    continue
+            elif self.backlog:
+                item = self.backlog.popleft()
+            else:
+                break
+            timestamp, frame = item
+            self.recorder.write(frame, timestamp, block=block)
+            sent += 1
+
+    def drop_backlog(self):
+        """ Forgets frames that did not reach the encoder before the clip ended. """
+        if self.preroll_frames is not None:
+            self.recorder.dropped += len(self.preroll)
+            self.preroll.clear()
+            self.preroll_frames = None
+        self.recorder.dropped += len(self.backlog)
+        self.backlog.clear()
+
+
+class MultiCameraDetector:
+    """
+    Runs one model over many cameras. Each source (device index, video file,
+    RTSP-style URL or "synthetic", see frame_sources.open_source) gets its own
+    capture thread that keeps only its newest frame. Every tick the newest
+    frame of each camera that has one waiting goes into a single batched model
+    call, and each result is routed back to that camera's trigger rule and
+    clip recorder. Per-camera capture / processed FPS go to the metrics registry.
+    Clips are added to 'catalog' (default: the process-wide one the viewer reads).
+    """
+
+    def __init__(self, sources, rule_text=None, imgsz=640, conf=0.25, record=False, video_folder=VIDEO_FOLDER,
+                 backend=None, catalog=None):
+        self.model = get_model('yolov8n.pt', backend)
+        self.imgsz = imgsz
+        self.conf = conf
+        self.video_folder = os.path.abspath(video_folder)
+        self.catalog = (catalog or shared_catalog()) if record else None
+        if record:
+            os.makedirs(self.video_folder, exist_ok=True)
+        self.streams = []
+        try:
+            for index, spec in enumerate(sources):
+                # Each camera gets its own rule object, so rules can differ per camera
+                rule = TriggerRule.parse(rule_text, self.model.names) if rule_text else None
+                self.streams.append(Stream(index, spec, rule, record))
+        except Exception:
+            # A camera that cannot be opened (or a bad rule) leaves no open cameras behind
+            for stream in self.streams:
+                stream.release()
+            raise
+        # One classes= filter for the batch: the union of every camera's rule
+        rules = [s.rule for s in self.streams if s.rule]
+        self.classes = sorted(set(c for r in rules for c in r.classes)) if len(rules) == len(self.streams) else None
+        self.ticks = 0
+
+    def start(self):
+        for stream in self.streams:
+            stream.capture.start()
+        metrics.start_exporters()  # HTTP endpoint / JSON dump, if configured
+        return self
+
+    def tick(self, timeout=0.05):
+        """ Runs one batch over the cameras with a new frame. Returns how many frames were processed. """
+        batch = []
+        deadline = time.perf_counter() + timeout
+        while not batch and time.perf_counter() < deadline:
+            for stream in self.streams:
+                item = stream.latest.get(timeout=0)
+                if item is not None:
+                    batch.append((stream, item))
+            if not batch:
+                time.sleep(0.002)
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        results = predict(self.model, [frame for _, (_, _, frame) in batch], imgsz=self.imgsz, conf=self.conf,
+                          classes=self.classes)
+        inference_ms = (time.perf_counter() - start) * 1000
+        metrics.registry.observe("batch_inference", inference_ms)
+        # Average batch size: the batched_frames / batches counters
+        metrics.registry.gauge("batch_size", len(batch))
+        metrics.registry.count("batches")
+        metrics.registry.count("batched_frames", len(batch))
+        metrics.registry.tick("batches")
+        self.ticks += 1
+
+        for (stream, (_, capture_time, frame)), result in zip(batch, results):
+            self._route(stream, capture_time, frame, result)
+        return len(batch)
+
+    def _route(self, stream, capture_time, frame, result):
+        """ Hands one camera's result to its rule, recorder and view. """
+        stream.processed += 1
+        metrics.registry.tick(f"{stream.name}_fps")
+        metrics.registry.gauge(f"{stream.name}_captured", stream.capture.frames)
+        metrics.registry.gauge(f"{stream.name}_dropped", stream.latest.dropped)
+        metrics.registry.observe(f"{stream.name}_latency", (time.time() - capture_time) * 1000)
+
+        detected = stream.rule.evaluate(result.boxes) if stream.rule else False
+        if detected:
+            stream.triggers += 1
+            metrics.registry.count(f"{stream.name}_triggers")
+
+        if stream.record and stream.recorder_thread is None:
+            stream.start_recorder(frame.shape)
+        if stream.record:
+            # Until the encoder is up, frames only go to the pre-roll
+            recorder = stream.recorder
+            recording = recorder is not None and recorder.recording
+            if detected and recorder is not None and not recording:
+                label = stream.rule.label()
+                media_id, path = self.catalog.reserve("video", self.video_folder, f"video_{label}_{stream.name}",
+                                                      ".mp4", f"camera:{stream.spec}", label)
+                self.catalog.add_detections(media_id, records_from_result(result, source=f"camera:{stream.spec}"))
+                # The pre-roll is sent a few slots at a time by feed_recorder(), never by waiting for the encoder
+                recorder.start(path, capture_time)
+                stream.preroll_frames = stream.preroll.drain()
+                print(f"[{stream.name}] recording {path}")
+                recording = True
+            if recording:
+                if len(stream.backlog) < RECORD_BACKLOG:
+                    stream.backlog.append((capture_time, frame))
+                else:
+                    recorder.dropped += 1
+                stream.feed_recorder()
+                finished = recorder.update(detected, capture_time)
+                if finished:
+                    stream.drop_backlog()
+                    print(f"[{stream.name}] saved {finished}")
+            else:
+                stream.preroll.push(frame, capture_time)
+
+        stream.view = (result, frame)
+
+    def grid(self):
+        """ The newest annotated frame of every camera in one image. """
+        columns = math.ceil(math.sqrt(len(self.streams)))
+        rows = math.ceil(len(self.streams) / columns)
+        width, height = CELL_SIZE
+        canvas = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+        for stream in self.streams:
+            if stream.view is None:
+                continue
+            result, frame = stream.view
+            x, y = (stream.index % columns) * width, (stream.index // columns) * height
+            canvas[y:y + height, x:x + width] = stream.renderer.render(frame, result)
+            cv2.putText(canvas, f"{stream.name} {metrics.registry.rate(stream.name + '_fps'):.1f} fps",
+                        (x + 8, y + 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        return canvas
+
+    def finished(self):
+        return all(stream.finished() for stream in self.streams)
+
+    def stats(self):
+        return {stream.name: {"source": str(stream.spec), "captured": stream.capture.frames,
+                              "processed": stream.processed, "dropped": stream.latest.dropped,
+                              "fps": round(metrics.registry.rate(f"{stream.name}_fps"), 2),
+                              "triggers": stream.triggers}
+                for stream in self.streams}
+
+    def stop(self):
+        for stream in self.streams:
+            stream.capture.stop()
+        for stream in self.streams:
+            stream.capture.join(timeout=2)
+            if stream.recorder_thread:
+                stream.recorder_thread.join()
+            if stream.recorder:
+                if stream.recorder.recording:
+                    stream.feed_recorder(block=True)  # The clip gets the frames still waiting
+                stream.recorder.stop()
+            # A capture thread still inside read() keeps its source; releasing it there can crash the backend
+            if stream.capture.is_alive():
+                print(f"[{stream.name}] capture thread did not stop; source left open")
+            else:
+                stream.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect objects on several cameras with one batched model call per tick.")
+    parser.add_argument("sources", nargs="+",
+                        help="device indices, video files (stand in for cameras), RTSP-style URLs or 'synthetic'")
+    parser.add_argument("--rule", help="trigger rule for every camera, e.g. 'person>=2@0.7, dog'")
+    parser.add_argument("--record", action="store_true", help="save a clip (with pre-roll) while a camera's rule holds")
+    parser.add_argument("--display", action="store_true", help="show all cameras in one grid window")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--duration", type=float, default=0, help="stop after this many seconds (0 = until 'q' / Ctrl+C)")
+    parser.add_argument("--stats-every", type=float, default=5.0, help="seconds between per-camera stats lines")
+    args = parser.parse_args(argv)
+    if args.record and not args.rule:
+        parser.error("--record needs --rule")
+
+    # Video files are paced like live cameras, so they can stand in for them
+    detector = MultiCameraDetector(args.sources, args.rule, args.imgsz, args.conf, args.record,
+                                   backend=args.backend)
+    started = last_stats = time.time()
+    try:
+        detector.start()
+        while not detector.finished():
+            detector.tick()
+            now = time.time()
+            if args.display:
+                cv2.imshow("Multi-camera", detector.grid())
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+            if now - last_stats >= args.stats_every:
+                last_stats = now
+                print("  ".join(f"{name}: {s['fps']} fps ({s['dropped']} dropped)"
+                                for name, s in detector.stats().items()))
+            if args.duration and now - started >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Also on errors: open clips are finished and capture threads stopped
+        detector.stop()
+        if args.display:
+            cv2.destroyAllWindows()
+    for name, stats in detector.stats().items():
+        print(name, stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
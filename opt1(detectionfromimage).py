@@ -1,16 +1,31 @@
+import os
+import sys
 import cv2
 import tkinter as tk
 from tkinter import filedialog
 from PIL import Image, ImageTk
-from ultralytics import YOLO  
+from model_host import get_model, inference_lock
+from tiled_inference import tiled_detect
+from detection_sessions import SessionManager, mode_window, run_mode_window
+from result_cache import ResultCache, cached_detect, detect_settings, file_digest, model_id
 
-# Load the pre-trained YOLOv8 model 
-model = YOLO('yolov8n.pt')
+# Get the shared pre-trained YOLOv8 model (loaded once per process)
+model = get_model('yolov8n.pt')
+
+# Detections of images seen before are served from .detcache/ instead of the model
+result_cache = ResultCache(model_id('yolov8n.pt'))
+
+# Headless batch mode: python "opt1(detectionfromimage).py" --batch <folder or glob> [options]
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "--batch":
+    import batch_detect
+    sys.exit(batch_detect.main(sys.argv[2:]))
 
 def upload_and_detect():
     """ 
-    Opens a file dialog to select an image, runs YOLOv8 detection on it,
-    and displays the image with detected objects.
+    Opens a file dialog to select an image, then runs YOLOv8 detection on it in
+    a background session, which shows the image with detected objects in its
+    own window. The main window stays responsive, so several images can be
+    opened at once.
     """
     # Open file selection dialog for image files
     file_path = filedialog.askopenfilename(filetypes=[("Image Files", "*.jpg;*.jpeg;*.png")])
@@ -18,33 +33,47 @@ def upload_and_detect():
     if not file_path:
         print("No file selected")  # If user cancels the dialog
         return
-    
+
+    # Read the option here: Tk variables belong to the GUI thread
+    tiled = tiled_mode.get()
+    sessions.start(os.path.basename(file_path), lambda session: detect_image(session, file_path, tiled))
+
+
+def detect_image(session, file_path, tiled):
+    """ Session work (runs in a worker thread): detect objects in one image and show the result. """
+    session.status("Detecting...")
+
     # Read the selected image using OpenCV
     image = cv2.imread(file_path)
-    
-    # Run object detection on the image
-    results = model(image)
-    
-    # Draw detection results on the image 
-    detected_image = results[0].plot()
+    if image is None:
+        raise ValueError(f"Could not read {file_path}")
 
-    # Resize image to fit nicely in the display window
-    screen_width = 800
-    screen_height = 600
-    detected_image_resized = cv2.resize(detected_image, (screen_width, screen_height))
-
-    # Show the detected image in a pop-up window
-    cv2.imshow("Detected Objects", detected_image_resized)
+    # Run object detection on the image (or reuse the result for an image with the same
+    # content); in high-resolution mode the image is split into overlapping tiles so
+    # small objects are not lost when it is scaled down
+    digest = file_digest(file_path)
+    with inference_lock:
+        if tiled:
+            results = cached_detect(model, result_cache, image, digest, file_path,
+                                    detect=lambda im: tiled_detect(model, im, tile=640, overlap=0.2, classes=None),
+                                    mode="tiled", tile=640, overlap=0.2)
+        else:
+            results = cached_detect(model, result_cache, image, digest, file_path, **detect_settings(640, 0.25))
+    if session.stopped:
+        return
 
-    # Wait for a key press, then close the image window
-    cv2.waitKey(0)
-    cv2.destroyAllWindows()
+    # Draw detection results on the image; the session window scales it to fit
+    session.show(results[0].plot())
+    session.status(f"{len(results[0].boxes)} objects detected")
 
 # Create main application window
-root = tk.Tk()
-root.title("YOLOv8 Object Detection")    # Window title
+# (a window of the launcher when started from finalGUI.py)
+root = mode_window("YOLOv8 Object Detection", globals().get("launcher_root"))
 root.state('zoomed')                     # Open in full screen mode
 
+# Detections run in worker threads; each one gets its own result window
+sessions = SessionManager(root)
+
 # Load and resize a background image to match the screen size
 bg_image = Image.open("extra/opt1bg.jpg")
 bg_image = bg_image.resize((root.winfo_screenwidth(), root.winfo_screenheight()))
@@ -74,5 +103,16 @@ btn_upload = tk.Button(
 )
 btn_upload.place(relx=0.5, rely=0.5, anchor="center")
 
+# High-resolution (tiled) detection option, for large photos with small objects
+tiled_mode = tk.BooleanVar(value=False)
+tk.Checkbutton(
+    root,
+    text="High-resolution mode (tiled detection)",
+    variable=tiled_mode,
+    font=("Arial", 14),
+    fg="white", bg="black",
+    selectcolor="black", activebackground="black", activeforeground="white"
+).place(relx=0.5, rely=0.6, anchor="center")
+
 # Start the GUI loop
-root.mainloop()
+run_mode_window(root)
@@ -1,57 +1,156 @@
+import time
+import tkinter as tk
 import cv2
-from ultralytics import YOLO
-
-# Load YOLO model
-model = YOLO('yolov8n.pt')
-
-# Open webcam
-webcamera = cv2.VideoCapture(0)
-
-# Get video feed dimensions
-frame_width = int(webcamera.get(3))  # Get frame width
-frame_height = int(webcamera.get(4))  # Get frame height
-
-# Define button position (bottom-right corner)
-exit_button_w, exit_button_h = 60, 30  # Smaller button size
-exit_button_x = frame_width - exit_button_w - 20  # 20px margin from right
-exit_button_y = frame_height - exit_button_h - 20  # 20px margin from bottom
-
-def click_event(event, x, y, flags, param):
-    """ Callback function to detect clicks on the exit button. """
-    global running
-    if event == cv2.EVENT_LBUTTONDOWN:
-        if exit_button_x <= x <= exit_button_x + exit_button_w and exit_button_y <= y <= exit_button_y + exit_button_h:
-            print("Exit button clicked. Closing program.")
-            running = False  # Stop the loop
-
-# Create a named window and set mouse callback
-cv2.namedWindow("Live Camera")
-cv2.setMouseCallback("Live Camera", click_event)
-
-running = True  # Flag to control the loop
-while running:
-    success, frame = webcamera.read()
-    if not success:
-        break
-
-    # Run YOLO detection
-    results = model.track(frame, conf=0.8, imgsz=480)
-
-    # Draw the exit button (bottom-right)
-    cv2.rectangle(frame, (exit_button_x, exit_button_y), 
-                  (exit_button_x + exit_button_w, exit_button_y + exit_button_h), (0, 0, 255), -1)
-    cv2.putText(frame, "EXIT", (exit_button_x + 10, exit_button_y + 20), 
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-    # Display detections and button
-    cv2.putText(frame, f"Total: {len(results[0].boxes)}", (50, 50), 
-                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-    cv2.imshow("Live Camera", results[0].plot())
-
-    # Press 'q' to exit
-    if cv2.waitKey(1) == ord('q'):
-        break
-
-# Cleanup
-webcamera.release()
-cv2.destroyAllWindows()
+from camera_pipeline import DetectionPipeline
+from model_host import get_tracker_model, track
+from frame_sources import open_source
+import metrics
+from motion_gate import MotionGate, reuse_results
+from renderer import make_renderer, LEAN
+from frame_sources import CAMERA_SOURCE
+from detection_log import DetectionLogWriter, new_log_folder
+from adaptive_control import AdaptiveController
+from detection_sessions import SessionManager, mode_window, run_mode_window
+
+# Show the performance overlay (toggle with 'h' in the camera window)
+SHOW_HUD = True
+
+# Skip the detector while the scene does not change; the last detections are shown instead.
+# sensitivity = fraction of pixels that must change, max_skip = most frames skipped in a row
+MOTION_SENSITIVITY = 0.005
+MOTION_MAX_SKIP = 30
+
+# Inference size and stride follow the measured inference time: the controller aims for
+# TARGET_FPS (starting at 480 px) and logs every change to adaptive_control.log
+TARGET_FPS = 15
+
+# Draw detections with the lean renderer ("plot" = ultralytics result.plot(), for comparison)
+# at no more than DISPLAY_WIDTH pixels wide; large camera frames are scaled down once
+RENDERER = LEAN
+DISPLAY_WIDTH = 1280
+
+
+def live_detection(session):
+    """
+    Live camera detection, run in a session worker thread (see detection_sessions.py):
+    capture and inference run in their own threads, this loop renders and hands
+    frames to the session window. Stops with the window's Stop button or 'q'.
+    """
+    # Tracking keeps state on the model, so each session gets its own instance (see model_host.get_tracker_model)
+    model = get_tracker_model('yolov8n.pt')
+    motion_gate = MotionGate(MOTION_SENSITIVITY, MOTION_MAX_SKIP)
+    controller = AdaptiveController(target_fps=TARGET_FPS, imgsz=480, name="live")
+    show_hud = SHOW_HUD
+
+    # Open webcam (or the video file / synthetic source named by CAMERA_SOURCE)
+    webcamera = open_source()
+
+    # Get video feed dimensions
+    frame_width = int(webcamera.get(3))  # Get frame width
+    frame_height = int(webcamera.get(4))  # Get frame height
+    if frame_width > DISPLAY_WIDTH:
+        frame_height = frame_height * DISPLAY_WIDTH // frame_width
+        frame_width = DISPLAY_WIDTH
+    render = make_renderer(RENDERER, display_size=(frame_width, frame_height) if frame_width else None)
+
+    # The newest result, whether it was reused from an earlier frame and whether anything moved since the
+    # model last ran (only used in the inference thread)
+    state = {"results": None, "reused": False, "motion": False}
+
+    def detect(frame):
+        """ Runs YOLO tracking on one frame (called from the inference thread). """
+        last_results = state["results"]
+        # The motion gate sees every frame, so motion on a frame the stride skips runs the model on the next one
+        state["motion"] = motion_gate.should_run(frame) or state["motion"]
+        state["reused"] = last_results is not None and (not controller.should_run() or not state["motion"])
+        if state["reused"]:
+            metrics.registry.count("frames_skipped")
+            metrics.registry.gauge("skip_fraction", round(motion_gate.skip_fraction, 3))
+            return reuse_results(last_results, frame)
+        start = time.perf_counter()
+        results = track(model, frame, conf=0.8, imgsz=controller.imgsz, classes=None)
+        inference_ms = (time.perf_counter() - start) * 1000
+        controller.record(inference_ms)
+        metrics.registry.observe("inference", inference_ms)
+        metrics.registry.gauge("imgsz", controller.imgsz)
+        metrics.registry.gauge("stride", controller.stride)
+        metrics.registry.tick("inference_fps")
+        metrics.registry.gauge("skip_fraction", round(motion_gate.skip_fraction, 3))
+        state["results"] = results
+        state["motion"] = False
+        return results
+
+    # Every inferred frame's detections are kept in a columnar log (see detection_log.py)
+    detection_log = DetectionLogWriter(new_log_folder(CAMERA_SOURCE), model.names, source=CAMERA_SOURCE)
+
+    def log_result(frame_id, capture_time, results):
+        # Reused results are old detections, not something seen on this frame
+        if not state["reused"]:
+            detection_log.append_result(frame_id, capture_time, results[0])
+
+    # Capture and inference run in their own threads; this loop only renders
+    pipeline = DetectionPipeline(webcamera, detect, on_result=log_result).start()
+    metrics.start_exporters()  # HTTP endpoint / JSON dump, if configured
+    session.status("Live detection; 'h' toggles the overlay, 'q' stops")
+
+    try:
+        while not session.stopped:
+            # Raises the inference thread's error, so the session shows it
+            item = pipeline.next_result()
+            if item is None and pipeline.finished():
+                break
+            if item is not None:
+                frame_id, capture_time, frame, results = item
+                render_start = time.perf_counter()
+                annotated = render(frame, results[0])
+                metrics.registry.observe("render", (time.perf_counter() - render_start) * 1000)
+                metrics.registry.tick("display_fps")
+                metrics.registry.observe("capture_to_display", (time.time() - capture_time) * 1000)
+                for name, value in pipeline.stats().items():
+                    metrics.registry.gauge(name, value)
+                metrics.registry.gauge("capture_queue", len(pipeline.capture_queue))
+
+                # The GUI draws the frame later, so it gets a copy (the renderer reuses its buffer)
+                annotated = annotated.copy()
+                cv2.putText(annotated, f"Total: {len(results[0].boxes)}", (50, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                session.show(metrics.draw_hud(annotated) if show_hud else annotated)
+
+            # Press 'q' in the camera window to stop, 'h' to show/hide the performance overlay
+            key = session.poll_key()
+            if key == 'q':
+                break
+            if key == 'h':
+                show_hud = not show_hud
+    finally:
+        # Cleanup
+        pipeline.stop()
+        # The inference thread appends to the log; it may still be finishing a model call after stop()'s timeout
+        pipeline.worker.join(timeout=30)
+        detection_log.close()
+        pipeline.capture.join()
+        webcamera.release()
+
+    print("Pipeline stats:", pipeline.stats())
+    print(f"Detector skipped on {motion_gate.skip_fraction:.1%} of frames (no motion)")
+    print("Adaptive control:", controller.state())
+    if pipeline.capture.frames == 0:
+        raise RuntimeError("Camera not available (is another session using it?)")
+
+
+# Main window of the mode (a window of the launcher when started from finalGUI.py).
+# The camera runs in a session, so the launcher stays responsive while it is open.
+root = mode_window("Live Camera Detection", globals().get("launcher_root"))
+root.configure(bg="black")
+sessions = SessionManager(root)
+
+tk.Label(root, text="Live camera detection", font=("Arial", 20, "bold"), fg="white", bg="black").pack(padx=40, pady=20)
+tk.Button(root, text="Start Camera", font=("Arial", 16), bg="blue", fg="white",
+          command=lambda: sessions.start("Live Camera", live_detection)).pack(side=tk.LEFT, padx=40, pady=20)
+tk.Button(root, text="Stop All", font=("Arial", 16), bg="black", fg="white",
+          command=sessions.stop_all).pack(side=tk.RIGHT, padx=40, pady=20)
+
+# The camera opens right away, as it always did
+sessions.start("Live Camera", live_detection)
+
+run_mode_window(root)
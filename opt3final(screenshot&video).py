@@ -1,14 +1,32 @@
 import cv2
-from ultralytics import YOLO
+from model_host import get_model, get_tracker_model, inference_lock, predict, track
+from frame_sources import open_source, CAMERA_SOURCE
+import metrics
+from trigger_rules import TriggerRule, RULE_HELP
+from motion_gate import MotionGate, reuse_results
+from tiled_inference import load_rois, roi_detect, roi_mask, boxes_in_mask
+from renderer import make_renderer, LEAN
+from segment_recorder import RetentionManager, SegmentRecorder, CONTINUOUS_EVENT
+from detection_log import DetectionLogWriter, new_log_folder
 import os
+import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from PIL import Image, ImageTk
 import time
+from preroll_buffer import PrerollBuffer
+from event_recorder import EventRecorder
+from media_writer import MediaWriter, BLOCK
+from detection_catalog import shared_catalog
+import video_index
+from detection_records import records_from_result
+from detection_sessions import SessionManager, mode_window, run_mode_window
+from track_dedup import TrackShotSelector, CONFIDENCE
+from adaptive_control import AdaptiveController
 
 
-# Load the YOLOv8 model (nano version)
-model = YOLO('yolov8n.pt')
+# Get the shared YOLOv8 model (nano version, loaded once per process)
+model = get_model('yolov8n.pt')
 
 # Get list of all detectable object names 
 object_names = list(model.names.values())
@@ -20,7 +38,7 @@ def format_tooltip_text(names, objects_per_line=5):
         lines.append(', '.join(names[i:i + objects_per_line]))
     return '\n'.join(lines)
 
-tooltip_text = format_tooltip_text(object_names)
+tooltip_text = RULE_HELP + "\n\n" + format_tooltip_text(object_names)
 
 
 
@@ -28,120 +46,335 @@ tooltip_text = format_tooltip_text(object_names)
 screenshot_folder = os.path.abspath("saved_screenshot")
 video_folder = os.path.abspath("saved_video")
 
+segment_folder = os.path.abspath("saved_segments")
+
 # Create the folders if they don't exist
 os.makedirs(screenshot_folder, exist_ok=True)
 os.makedirs(video_folder, exist_ok=True)
-
-
-
-def open_camera(action, object_name):
+os.makedirs(segment_folder, exist_ok=True)
+
+# Index of every saved screenshot / clip and what was detected in it
+catalog = shared_catalog()
+
+# Disk quota and age limit for everything saved (screenshots, clips, segments).
+# Oldest files go first; detections (screenshots, clips, segments with an event) go last.
+STORAGE_QUOTA_BYTES = 20 * 1024 ** 3
+MAX_AGE_DAYS = 30
+EVENT_MAX_AGE_DAYS = 90
+
+# Source recorded in the catalog for saved files (the same form multi-camera mode uses)
+CATALOG_SOURCE = f"camera:{CAMERA_SOURCE}"
+
+# Length of each file in continuous recording, and its frame rate; frames are repeated or
+# dropped by capture time, so segments play in real time at any camera rate
+SEGMENT_SECONDS = 60
+SEGMENT_FPS = 20.0
+
+# One retention manager serves every running camera session: it is created (folders scanned once)
+# when the first session starts and stopped when the last one ends. Two managers on the same
+# folders would overwrite each other's list of protected files.
+_retention = None
+_retention_users = 0
+_retention_lock = threading.Lock()
+
+# Seconds of footage kept from before a detection and included at the start of each clip,
+# and the most memory (in bytes, JPEG-compressed) that footage may use
+PREROLL_SECONDS = 3.0
+PREROLL_MAX_BYTES = 32 * 1024 * 1024
+
+# Event clips: frame rate of the saved file (frames are placed by their capture time, so the
+# clip plays at real speed whatever rate the camera loop ran at), shortest clip, and how long
+# a clip continues after the objects were last seen
+CLIP_FPS = 20.0
+MIN_CLIP_SECONDS = 5.0
+POST_ROLL_SECONDS = 3.0
+MAX_CLIP_SECONDS = 300.0
+
+# Screenshots and video frames waiting to be encoded, and what to do when that queue is full
+# (BLOCK slows the camera loop down instead of losing frames; see media_writer.py)
+WRITER_QUEUE_SIZE = 64
+WRITER_POLICY = BLOCK
+
+# Motion gate in front of the detector: fraction of pixels that must change for the
+# model to run, and the most frames in a row it may be skipped
+MOTION_SENSITIVITY = 0.005
+MOTION_MAX_SKIP = 30
+
+# How detections are drawn: "lean" (only the rule's classes, reused buffer) or "plot" (ultralytics)
+RENDERER = LEAN
+
+# Time budget per frame: the size (320-640 px) follows the model call's latency and the stride
+# its share of the frame time; each change is logged to adaptive_control.log
+TARGET_INFERENCE_MS = 80
+
+# Screenshot mode saves one picture per tracked object: the best frame (CONFIDENCE or
+# SHARPNESS) seen during its first SHOT_WINDOW_SECONDS
+SHOT_WINDOW_SECONDS = 1.0
+SHOT_SCORE = CONFIDENCE
+
+# Show the performance overlay in the session window (toggle with 'h')
+SHOW_HUD = True
+
+
+
+def report_screenshot(path, ok):
+    """ Called by the media writer once a screenshot has been written. """
+    if ok:
+        print(f"Screenshot saved at {path}")
+    else:
+        print("Failed to save screenshot!")
+
+
+def forget_file(path):
+    """ Called for each file the retention manager deletes: drops it from the catalog, and a video's index and poster. """
+    catalog.remove(path)
+    video_index.remove_sidecars(path)
+
+
+def acquire_retention():
+    """ Returns the retention manager, starting it for the first camera session. """
+    global _retention, _retention_users
+    with _retention_lock:
+        if _retention is None:
+            _retention = RetentionManager([segment_folder, screenshot_folder, video_folder], STORAGE_QUOTA_BYTES,
+                                          MAX_AGE_DAYS * 86400, EVENT_MAX_AGE_DAYS * 86400, on_delete=forget_file)
+            _retention.start()
+        _retention_users += 1
+        return _retention
+
+
+def release_retention():
+    """ Stops the retention manager once no camera session uses it any more. """
+    global _retention, _retention_users
+    with _retention_lock:
+        _retention_users -= 1
+        if _retention_users == 0:
+            _retention.stop()
+            _retention = None
+
+
+def open_camera(action, rule_text, session):
     """
     This function captures live webcam video,
-    detects the specified object using YOLOv8,
+    detects the objects named in the trigger rule using YOLOv8,
     and performs screenshot or video capture depending on 'action'.
+    It runs in a session worker thread (see detection_sessions.py) until the
+    session is stopped; frames go to the session window instead of cv2.imshow.
     """
-    webcamera = cv2.VideoCapture(0)
-    exit_button_pressed = False
-    object_in_frame = False  # Avoid repeating screenshots
-    recording = False
-    video_writer = None
-    video_start_time = 0  
-    recording_end_time = 0
-
-    # Mouse click handler for detecting custom "Exit" button click
-    def mouse_callback(event, x, y, flags, param):
-        nonlocal exit_button_pressed
-        if event == cv2.EVENT_LBUTTONDOWN:
-            if 20 <= x <= 120 and frame.shape[0] - 70 <= y <= frame.shape[0] - 20:
-                print("Exit button clicked, closing camera window...")
-                exit_button_pressed = True
-
-    cv2.namedWindow("Live Detection", cv2.WINDOW_NORMAL)
-
-    while True:
-        success, frame = webcamera.read()
-        if not success:
-            break
-
-        cv2.setMouseCallback("Live Detection", mouse_callback)
-
-        # Run YOLO object detection
-        results = model(frame)
-        detected = False
-
-        # Loop through results to check for target object
-        for result in results:
-            frame = result.plot()  # Draw bounding boxes
-            for box in result.boxes:
-                detected_class = model.names[int(box.cls[0])]
-                confidence = box.conf[0].item()
-                if detected_class.lower() == object_name.lower() and confidence > 0.6:
-                    detected = True
-                    break
-
-        # Draw a red rectangle for the custom "Exit" button
-        cv2.rectangle(frame, (20, frame.shape[0] - 70), (120, frame.shape[0] - 20), (0, 0, 255), -1)
-        cv2.putText(frame, "Exit", (40, frame.shape[0] - 35), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
-
-        cv2.imshow("Live Detection", frame)
-
-        # If object is detected and screenshot is selected
+    retention = acquire_retention()
+    try:
+        run_camera(action, rule_text, session, retention)
+    finally:
+        release_retention()
+
+
+def run_camera(action, rule_text, session, retention):
+    """ The camera loop of open_camera(); new files are reported to 'retention'. """
+    try:
+        rule = TriggerRule.parse(rule_text, model.names)
+    except ValueError as e:
+        raise ValueError(f"Invalid trigger rule: {e}") from None
+    object_name = rule.label()  # Used in file names and the catalog
+
+    webcamera = open_source()  # Webcam, or the source named by CAMERA_SOURCE
+    success, frame = webcamera.read()
+    capture_time = time.time()
+    if not success:
+        webcamera.release()
+        raise RuntimeError("Camera not available (is another session using it?)")
+    session.status(f"Watching for {object_name} ({action}); 'h' toggles the overlay")
+    # Pre-roll frames are JPEG-encoded by the buffer's own thread, not by this loop
+    preroll = PrerollBuffer(PREROLL_SECONDS, PREROLL_MAX_BYTES, background=True)
+    media_writer = MediaWriter(WRITER_QUEUE_SIZE, WRITER_POLICY)
+    media_writer.start()
+    metrics.start_exporters()  # HTTP endpoint / JSON dump, if configured
+    show_hud = SHOW_HUD
+    motion_gate = MotionGate(MOTION_SENSITIVITY, MOTION_MAX_SKIP)
+    controller = AdaptiveController(target_ms=TARGET_INFERENCE_MS, imgsz=640, name=f"{action}:{object_name}")
+    results = None
+    motion_seen = False  # Motion since the model last ran
+
+    # Regions of interest for this camera (rois.json); when set, only they are sent to the model
+    rois = load_rois(CAMERA_SOURCE)
+    mask = None
+
+    # Video mode: clips are encoded in a separate process (see event_recorder.py)
+    event_recorder = None
+    if action == "video":
+        event_recorder = EventRecorder(frame.shape, CLIP_FPS, post_roll_s=POST_ROLL_SECONDS,
+                                       min_clip_s=MIN_CLIP_SECONDS, max_clip_s=MAX_CLIP_SECONDS)
+
+    # Continuous recording: fixed-length segments, the ones with a detection are protected
+    segment_recorder = None
+    if action == "continuous":
+        segment_recorder = SegmentRecorder(segment_folder, media_writer, retention, SEGMENT_SECONDS, SEGMENT_FPS, CONTINUOUS_EVENT)
+
+    # Detections of every inferred frame go to a columnar log for later analysis without re-running the model
+    detection_log = DetectionLogWriter(new_log_folder(CAMERA_SOURCE), model.names, source=CAMERA_SOURCE)
+    frame_id = 0
+
+    # Saved media keeps the camera resolution, so drawing happens at capture size here
+    render = make_renderer(RENDERER, classes=rule.classes)
+
+    # Screenshot mode tracks objects and saves one screenshot per track id. Each session
+    # tracks with its own model instance: the tracker's state lives on the model's predictor.
+    shot_selector = None
+    if action == "screenshot":
+        tracker_model = get_tracker_model('yolov8n.pt')
+        shot_selector = TrackShotSelector(SHOT_WINDOW_SECONDS, SHOT_SCORE)
+
+    def save_shot(shot):
+        shot_frame = shot["frame"]
+        shot_result = reuse_results([shot["result"]], shot_frame)[0]  # Point it back at its own frame
+        media_id, screenshot_path = catalog.reserve(
+            "screenshot", screenshot_folder, f"screenshot_{object_name}", ".jpg", CATALOG_SOURCE, object_name)
+        catalog.add_detections(media_id, records_from_result(shot_result, source=CATALOG_SOURCE))
+        media_writer.save_image(screenshot_path, render(shot_frame, shot_result).copy(), on_done=report_screenshot)
+        retention.add(screenshot_path, protected=True)
+        metrics.registry.count("screenshots")
+
+    while not session.stopped:
+        if frame is None:
+            success, frame = webcamera.read()
+            capture_time = time.time()
+            if not success:
+                break
+
+        # Run YOLO object detection, only for the classes the rule mentions.
+        # When nothing moved, or on frames the controller's stride skips, the previous detections are reused.
+        # The motion gate sees every frame, so motion on a frame the stride skips runs the model on the next one.
+        motion_seen = motion_gate.should_run(frame) or motion_seen
+        inferred = results is None or (controller.should_run() and motion_seen)
+        if inferred:
+            motion_seen = False
+        if inferred:
+            # Only the model call is timed: waiting for another session's turn on the model is not its latency
+            if shot_selector:
+                inference_start = time.perf_counter()
+                results = track(tracker_model, frame, imgsz=controller.imgsz, classes=rule.classes)
+                inference_ms = (time.perf_counter() - inference_start) * 1000
+                if rois:
+                    # Tracking needs the whole frame; boxes outside the regions are dropped afterwards
+                    if mask is None:
+                        mask = roi_mask(frame.shape, rois)
+                    results = [results[0][boxes_in_mask(results[0].boxes, mask)]]
+            else:
+                if rois and mask is None:
+                    mask = roi_mask(frame.shape, rois)
+                with inference_lock:  # Other sessions share the model
+                    inference_start = time.perf_counter()
+                    if rois:
+                        results = roi_detect(model, frame, rois, imgsz=controller.imgsz, classes=rule.classes, mask=mask)
+                    else:
+                        results = predict(model, frame, imgsz=controller.imgsz, classes=rule.classes)
+                    inference_ms = (time.perf_counter() - inference_start) * 1000
+            controller.record(inference_ms)
+            metrics.registry.observe("inference", inference_ms)
+            metrics.registry.gauge("imgsz", controller.imgsz)
+            metrics.registry.gauge("stride", controller.stride)
+        else:
+            results = reuse_results(results, frame)
+            metrics.registry.count("frames_skipped")
+        metrics.registry.tick("fps")
+        metrics.registry.gauge("skip_fraction", round(motion_gate.skip_fraction, 3))
+
+        # Reused detections are not logged again: the log only holds what the model saw on each frame
+        if inferred:
+            detection_log.append_result(frame_id, time.time(), results[0])
+        frame_id += 1
+
+        # Check the trigger rule on all boxes at once
+        detected = rule.evaluate(results[0].boxes)
+
+        # Offer the matching tracked objects to the selector before the frame is drawn on
+        if shot_selector:
+            keep = rule.matches(results[0].boxes) if detected else []
+            for shot in shot_selector.update(frame, results[0], time.time(), keep):
+                save_shot(shot)
+        render_start = time.perf_counter()
+        frame = render(frame, results[0])  # Draw bounding boxes
+        metrics.registry.observe("render", (time.perf_counter() - render_start) * 1000)
+
+        # Writer gauges are kept current for the exporters too, not only while the overlay is shown
+        metrics.registry.gauge("writer_queue", len(media_writer.items))
+        metrics.registry.gauge("writer_dropped", media_writer.dropped)
+
+        # The GUI draws the frame later, so it gets a copy (the renderer reuses its buffer);
+        # the overlay goes on that copy so it never ends up in saved screenshots / clips
+        if show_hud:
+            session.show(metrics.draw_hud(frame.copy()))
+        else:
+            session.show(frame.copy())
+
+        # If object is detected and video is selected (screenshots are handled by the selector above)
         if detected:
-            if action == "screenshot" and not object_in_frame:
-                screenshot_path = os.path.join(
-                    screenshot_folder, f"screenshot_{object_name}_{len(os.listdir(screenshot_folder))}.jpg")
-                if cv2.imwrite(screenshot_path, frame):
-                    print(f"Screenshot saved at {screenshot_path}")
-                else:
-                    print("Failed to save screenshot!")
-                object_in_frame = True
-
-            # If object is detected and video is selected
-            elif action == "video" and not recording:
-                video_path = os.path.join(
-                    video_folder, f"video_{object_name}_{len(os.listdir(video_folder))}.mp4")
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                video_writer = cv2.VideoWriter(video_path, fourcc, 20.0, (frame.shape[1], frame.shape[0]))
-                recording = True
-                video_start_time = time.time()
-                recording_end_time = video_start_time + 5
-                print("Recording video for at least 5 seconds...")
-
-        # Write video frames if recording
-        if recording and video_writer:
-            video_writer.write(frame)
-
-        # Stop recording after 5 seconds
-        if recording and time.time() >= recording_end_time:
-            print("5 seconds passed, stopping video recording.")
-            recording = False
-            video_writer.release()
-            video_writer = None
-
-        # Reset flag if object is no longer detected
-        if not detected:
-            object_in_frame = False
-
-        if exit_button_pressed:
-            break
-
-        # Press 'q' key to manually exit
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
+            if event_recorder and not event_recorder.recording:
+                media_id, video_path = catalog.reserve(
+                    "video", video_folder, f"video_{object_name}", ".mp4", CATALOG_SOURCE, object_name)
+                catalog.add_detections(media_id, records_from_result(results[0], source=CATALOG_SOURCE))
+                retention.add(video_path, protected=True)
+                # Start the clip with the buffered seconds before the detection
+                event_recorder.start(video_path, capture_time, preroll.drain())
+                metrics.registry.count("clips")
+                session.status(f"Recording while {object_name} is in view (at least {MIN_CLIP_SECONDS:g} s)...")
+
+        # Continuous mode records every frame; detections protect the current segment
+        if segment_recorder:
+            segment_recorder.write(frame.copy(), capture_time)
+            if detected:
+                segment_recorder.mark_event()
+
+        # Send video frames to the encoder while recording, otherwise remember them as pre-roll.
+        # The clip ends POST_ROLL_SECONDS after the trigger stops holding.
+        if event_recorder and event_recorder.recording:
+            event_recorder.write(frame, capture_time)  # Copied into shared memory
+            finished = event_recorder.update(detected, capture_time)
+            if finished:
+                session.status(f"Clip saved: {os.path.basename(finished)}")
+        elif event_recorder:
+            preroll.push(frame.copy(), capture_time)  # A copy: the renderer reuses its buffer
+        if event_recorder:
+            metrics.registry.gauge("clip_frames_dropped", event_recorder.dropped)
+
+        # Press 'q' in the session window to stop, 'h' to show/hide the performance overlay
+        key = session.poll_key()
+        if key == 'q':
             break
+        if key == 'h':
+            show_hud = not show_hud
+        frame = None
 
     # Cleanup on exit
-    if recording and video_writer:
-        video_writer.release()
+    if shot_selector:
+        for shot in shot_selector.flush(time.time()):
+            save_shot(shot)
+        print(f"{shot_selector.shots} screenshots, one per tracked object")
+    if event_recorder:
+        event_recorder.stop()  # Finishes the open clip
+        print(f"{event_recorder.clips} clips, {event_recorder.dropped} frames dropped (encoder busy)")
+    if segment_recorder:
+        segment_recorder.close()
+    preroll.stop()
+    detection_log.close()
+    media_writer.stop()  # Waits for queued screenshots/frames to reach the disk
+    print("Media writer stats:", media_writer.stats())
+    print(f"Detector skipped on {motion_gate.skip_fraction:.1%} of frames (no motion)")
+    print("Adaptive control:", controller.state())
     webcamera.release()
-    cv2.destroyWindow("Live Detection")
+    session.status("Stopped")
 
 
 
-def start_gui():
-    root = tk.Tk()
+def start_gui(launcher_root=None):
+    root = mode_window("Object Detector", launcher_root)
     root.state("zoomed")
-    root.title("Object Detector")
+
+    # Camera sessions run in worker threads, each shown in its own window with a Stop button
+    sessions = SessionManager(root)
+
+    def start_session(action):
+        rule_text = object_name_entry.get()  # Read on the GUI thread
+        sessions.start(f"{action}: {rule_text}", lambda session: open_camera(action, rule_text, session))
 
     # Load and display background image
     bg_image = Image.open("extra/opt2bg.jpg")
@@ -149,13 +382,14 @@ def start_gui():
     bg_photo = ImageTk.PhotoImage(bg_image)
     bg_label = tk.Label(root, image=bg_photo)
     bg_label.place(relwidth=1, relheight=1)
+    bg_label.image = bg_photo  # Keep a reference; under the launcher this function returns right away
 
     # Frame to hold input and buttons
     frame = tk.Frame(root, bg='black')
     frame.place(relx=0.5, rely=0.3, anchor=tk.CENTER)
 
     # Label and Entry to input object name
-    label = tk.Label(frame, text="Enter object name:", font=("Arial", 20), fg="white", bg="black")
+    label = tk.Label(frame, text="Enter object name(s):", font=("Arial", 20), fg="white", bg="black")
     label.grid(row=0, column=0, padx=10, pady=10, sticky='w')
 
     object_name_entry = tk.Entry(frame, font=("Arial", 20), width=30)
@@ -199,7 +433,7 @@ def start_gui():
     screenshot_button = tk.Button(
         button_frame, text="Screenshot", font=("Arial", 18),
         bg="black", fg="white", activebackground="gray", activeforeground="white",
-        command=lambda: open_camera("screenshot", object_name_entry.get())
+        command=lambda: start_session("screenshot")
     )
     screenshot_button.pack(side=tk.LEFT, padx=50)
 
@@ -207,15 +441,31 @@ def start_gui():
     video_button = tk.Button(
         button_frame, text="Take Video", font=("Arial", 18),
         bg="black", fg="white", activebackground="gray", activeforeground="white",
-        command=lambda: open_camera("video", object_name_entry.get())
+        command=lambda: start_session("video")
     )
     video_button.pack(side=tk.LEFT, padx=50)
 
+    # Continuous recording button (segments; detections are kept longest)
+    continuous_button = tk.Button(
+        button_frame, text="Continuous", font=("Arial", 18),
+        bg="black", fg="white", activebackground="gray", activeforeground="white",
+        command=lambda: start_session("continuous")
+    )
+    continuous_button.pack(side=tk.LEFT, padx=50)
+
+    # Stops every running session (each session window also has its own Stop button)
+    stop_all_button = tk.Button(
+        button_frame, text="Stop All", font=("Arial", 18),
+        bg="black", fg="white", activebackground="gray", activeforeground="white",
+        command=sessions.stop_all
+    )
+    stop_all_button.pack(side=tk.LEFT, padx=50)
+
     # Bind hover effects to buttons
-    for button in [screenshot_button, video_button]:
+    for button in [screenshot_button, video_button, continuous_button, stop_all_button]:
         button.bind("<Enter>", lambda e, b=button: on_hover(b))
         button.bind("<Leave>", lambda e, b=button: on_leave(b))
 
-    root.mainloop()
+    run_mode_window(root)
 
-start_gui()
+start_gui(globals().get("launcher_root"))
@@ -1,22 +1,52 @@
 import os
+import time
+import collections
 import cv2
 import tkinter as tk
 from tkinter import Label, Menu, messagebox, Frame, Canvas
-from PIL import Image, ImageTk
+from PIL import ImageTk
+from detection_catalog import shared_catalog
+from detection_sessions import mode_window, run_mode_window
+from thumbnail_cache import ThumbnailCache
+import video_index
 
 # Define folder paths for saved screenshots and videos
 screenshot_folder = "saved_screenshot"
 video_folder = "saved_video"
 
-# Create the main GUI window
-root = tk.Tk()
-root.title("Detected Objects Viewer")
+# Saved files are looked up in the detection catalog instead of listing the folders.
+# Files in the folders that the catalog does not list yet (e.g. saved before it existed) are added on every start.
+catalog = shared_catalog()
+catalog.import_folder("screenshot", screenshot_folder, (".jpg", ".png", ".jpeg"))
+catalog.import_folder("video", video_folder, (".mp4", ".avi", ".mov"))
+
+# Time range choices for the filter bar (seconds back from now)
+TIME_RANGES = {"All time": None, "Last hour": 3600, "Last 24 hours": 86400, "Last 7 days": 7 * 86400}
+
+# Create the main GUI window (a window of the launcher when started from finalGUI.py)
+root = mode_window("Detected Objects Viewer", globals().get("launcher_root"))
 root.state("zoomed")  # Launch in maximized mode
 root.configure(bg="black")
 root.resizable(True, True)
 
-# Used to hold references to images so they are not garbage collected
-image_references = []
+# Thumbnail size and the width of one slot in the screenshot strip (thumbnail + padding)
+THUMB_SIZE = 200
+THUMB_SLOT = THUMB_SIZE + 10
+
+# Most thumbnails kept in memory as Tk images; the rest are reloaded from the disk cache
+MAX_LOADED_THUMBNAILS = 300
+
+# Thumbnails are generated in the background and cached on disk between runs
+thumbnails = ThumbnailCache(size=(THUMB_SIZE, THUMB_SIZE))
+
+image_paths = []                              # Screenshots in the strip, in display order
+visible_labels = {}                           # path -> (canvas window id, Label) for slots on screen
+image_references = collections.OrderedDict()  # path -> PhotoImage, kept so they are not garbage collected
+
+# Video indexes (frame count, fps, keyframes, poster) are built once in the background and saved next to the video
+video_indexer = video_index.VideoIndexer()
+video_buttons = {}   # path -> Button in the video list
+video_posters = {}   # path -> PhotoImage of the poster frame
 
 def open_image(image_path):
     """Opens an image using OpenCV when the image thumbnail is clicked."""
@@ -29,17 +59,76 @@ def open_image(image_path):
     cv2.destroyAllWindows()
 
 def play_video(video_path):
-    """Plays a video using OpenCV when a video button is clicked."""
+    """Plays a video using OpenCV when a video button is clicked.
+    Frames are shown at the video's own frame rate. The video index is loaded (or built)
+    in the background while playback starts; the slider appears once it is ready."""
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         print(f"Error: Unable to open video {video_path}")
         return
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index_future = video_indexer.pool.submit(video_index.get_index, video_path)
+    index = None          # The video index, once loaded
+    frame_count = 0       # Frames the slider covers (0 = no slider yet)
+    position = 0          # Number of the next frame to be read
+    seek_to = None        # Frame requested with the slider
+    slider_moving = False # True while the slider is moved by playback rather than the user
+
+    def on_seek(value):
+        nonlocal seek_to
+        if not slider_moving:
+            seek_to = value
+
+    cv2.namedWindow("Video Player")
+
+    # Wall-clock time at which frame 'clock_frame' should be on screen
+    clock_start, clock_frame = time.perf_counter(), 0
+
     while cap.isOpened():
+        if index is None and index_future.done():
+            try:
+                index = index_future.result()
+            except Exception as e:
+                print(f"Error indexing video {video_path}: {e}")
+                index = {}  # Play on without seeking
+            frame_count = index.get("frame_count", 0)
+            if frame_count > 1:
+                cv2.createTrackbar("Position", "Video Player", min(position, frame_count - 1), frame_count - 1, on_seek)
+            else:
+                frame_count = 0
+
+        if seek_to is not None:
+            if index["exact_keyframes"]:
+                # Jump to the keyframe before the target and skip forward without converting frames.
+                # Without PyAV the index only has estimated keyframes; OpenCV then seeks to the frame itself
+                keyframe = video_index.keyframe_before(index, seek_to)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                for _ in range(seek_to - keyframe):
+                    cap.grab()
+            else:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, seek_to)
+            position, seek_to = seek_to, None
+            clock_start, clock_frame = time.perf_counter(), position
+
+        # Skip frames we are already too late for
+        due = clock_start + (position - clock_frame) / fps
+        while time.perf_counter() - due > 1.0 / fps and cap.grab():
+            position += 1
+            due = clock_start + (position - clock_frame) / fps
+
         ret, frame = cap.read()
         if not ret:
             break
+        position += 1
         cv2.imshow("Video Player", frame)
-        key = cv2.waitKey(25) & 0xFF
+        if frame_count:
+            slider_moving = True
+            cv2.setTrackbarPos("Position", "Video Player", min(position, frame_count - 1))
+            slider_moving = False
+
+        # Wait until the next frame is due
+        wait_ms = int((clock_start + (position - clock_frame) / fps - time.perf_counter()) * 1000)
+        key = cv2.waitKey(max(1, wait_ms)) & 0xFF
         if key == ord('q') or cv2.getWindowProperty("Video Player", cv2.WND_PROP_VISIBLE) < 1:
             break
     cap.release()
@@ -51,7 +140,10 @@ def delete_file(file_path, widget):
     if confirm:
         try:
             os.remove(file_path)
+            catalog.remove(file_path)
+            video_index.remove_sidecars(file_path)
             widget.destroy()
+            load_images()  # Closes the gap in the screenshot strip
         except Exception as e:
             print(f"Error deleting file {file_path}: {e}")
 
@@ -68,19 +160,18 @@ def on_mouse_wheel_horizontal(event, canvas):
 def on_mouse_wheel_vertical(event, canvas):
     canvas.yview_scroll(-1 * (event.delta // 120), "units")
 
-# Create a horizontally scrollable frame for images
-def create_horizontal_scrollable_frame(parent):
+# Create a horizontally scrolling canvas for image thumbnails.
+# Only the slots currently in view get a Label widget (see update_visible_images).
+def create_horizontal_image_strip(parent):
     outer_frame = Frame(parent, bg="black")
-    canvas = Canvas(outer_frame, bg="black", highlightthickness=0)
-    frame = Frame(canvas, bg="black")
-    canvas.configure(xscrollcommand=None)  # No scrollbar
+    canvas = Canvas(outer_frame, bg="black", highlightthickness=0, height=THUMB_SIZE + 10)
+    canvas.configure(xscrollcommand=lambda first, last: update_visible_images())  # No scrollbar
     canvas.pack(side="top", fill="both", expand=True)
-    canvas.create_window((0, 0), window=frame, anchor="nw")
-    frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+    canvas.bind("<Configure>", lambda e: update_visible_images())
     canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", lambda event: on_mouse_wheel_horizontal(event, canvas)))
     canvas.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
     outer_frame.pack(fill="both", expand=True)
-    return frame
+    return canvas
 
 # Create a vertically scrollable frame for videos
 def create_vertical_scrollable_frame(parent):
@@ -96,53 +187,143 @@ def create_vertical_scrollable_frame(parent):
     outer_frame.pack(fill="both", expand=True)
     return frame
 
-def load_images():
-    """Loads all image thumbnails from the screenshot folder."""
-    global image_references
-    image_references.clear()  # Reset references
-    for widget in frame_images.winfo_children():
-        widget.destroy()
+def query_catalog(kind):
+    """Returns paths of saved files of one kind matching the class / time filter."""
+    seconds = TIME_RANGES[time_range.get()]
+    since = time.time() - seconds if seconds else None
+    rows = catalog.query(kind=kind, class_name=class_filter.get().strip() or None, since=since)
+    return [row["path"] for row in rows if os.path.exists(row["path"])]
 
-    if not os.path.exists(screenshot_folder):
+def load_images():
+    """Updates the screenshot strip to the files matching the current filter.
+    Thumbnails of files that were already shown are kept, so only new files cost anything."""
+    new_paths = query_catalog("screenshot")
+    if new_paths == image_paths:
         return
 
-    image_files = [f for f in os.listdir(screenshot_folder) if f.endswith((".jpg", ".png", ".jpeg"))]
-    for img_file in image_files:
-        img_path = os.path.join(screenshot_folder, img_file)
-        try:
-            img = Image.open(img_path)
-            img.thumbnail((200, 200))  # Resize for thumbnail display
-            img_tk = ImageTk.PhotoImage(img)
-            image_references.append(img_tk)
-            label = Label(frame_images, image=img_tk, cursor="hand2", bg="black")
-            label.pack(side="left", padx=5, pady=1)
-            label.bind("<Button-1>", lambda e, p=img_path: open_image(p))  # Left-click to open
-            label.bind("<Button-3>", lambda e, p=img_path, w=label: show_context_menu(e, p, w))  # Right-click for delete
-        except Exception as e:
-            print(f"Error loading image {img_file}: {e}")
+    # Forget removed files
+    kept = set(new_paths)
+    for path in list(visible_labels):
+        if path not in kept:
+            remove_visible_label(path)
+    for path in list(image_references):
+        if path not in kept:
+            del image_references[path]
+
+    image_paths[:] = new_paths
+    frame_images.configure(scrollregion=(0, 0, len(image_paths) * THUMB_SLOT, THUMB_SIZE + 10))
+    update_visible_images()
+
+def update_visible_images():
+    """Creates Labels for the strip slots in view (plus a small margin) and drops the others."""
+    left = frame_images.canvasx(0)
+    first = max(0, int(left // THUMB_SLOT) - 2)
+    last = min(len(image_paths), int((left + frame_images.winfo_width()) // THUMB_SLOT) + 3)
+    wanted = set(image_paths[first:last])
+
+    for path in list(visible_labels):
+        if path not in wanted:
+            remove_visible_label(path)
+
+    for index in range(first, last):
+        path = image_paths[index]
+        x = index * THUMB_SLOT + 5
+        if path in visible_labels:
+            frame_images.coords(visible_labels[path][0], x, 1)  # Slots move when files are added/removed
+            continue
+        label = Label(frame_images, image=placeholder_image, cursor="hand2", bg="black")
+        label.bind("<Button-1>", lambda e, p=path: open_image(p))  # Left-click to open
+        label.bind("<Button-3>", lambda e, p=path, w=label: show_context_menu(e, p, w))  # Right-click for delete
+        window_id = frame_images.create_window((x, 1), window=label, anchor="nw")
+        visible_labels[path] = (window_id, label)
+
+        if path in image_references:
+            image_references.move_to_end(path)
+            label.config(image=image_references[path])
+        else:
+            thumbnails.request(path)
+
+def remove_visible_label(path):
+    window_id, label = visible_labels.pop(path)
+    frame_images.delete(window_id)
+    label.destroy()
+
+def poll_thumbnails():
+    """Turns thumbnails finished by the background workers into Tk images (Tk thread only)."""
+    if not root.winfo_exists():
+        return  # Window closed
+    while not thumbnails.results.empty():
+        path, img = thumbnails.results.get_nowait()
+        if img is None or path not in visible_labels:
+            continue
+        img_tk = ImageTk.PhotoImage(img)
+        image_references[path] = img_tk
+        visible_labels[path][1].config(image=img_tk)
+
+        # Keep memory bounded: drop the least recently shown thumbnails that are off screen
+        for old_path in list(image_references):
+            if len(image_references) <= MAX_LOADED_THUMBNAILS:
+                break
+            if old_path not in visible_labels:
+                del image_references[old_path]
+    root.after(50, poll_thumbnails)
 
 def load_videos():
-    """Loads all video files and creates buttons to play them."""
+    """Lists the saved videos matching the current filter as buttons to play them.
+    Poster frames and durations are filled in once the video index is ready."""
     for widget in frame_videos.winfo_children():
         widget.destroy()
+    video_buttons.clear()
+    video_posters.clear()
 
-    if not os.path.exists(video_folder):
-        return
-
-    video_files = [f for f in os.listdir(video_folder) if f.endswith((".mp4", ".avi", ".mov"))]
-    for vid_file in video_files:
-        vid_path = os.path.join(video_folder, vid_file)
-        btn = tk.Button(frame_videos, text=vid_file, command=lambda p=vid_path: play_video(p), bg="#444", fg="white")
+    for vid_path in query_catalog("video"):
+        vid_file = os.path.basename(vid_path)
+        btn = tk.Button(frame_videos, text=vid_file, command=lambda p=vid_path: play_video(p), bg="#444", fg="white",
+                        compound="left", anchor="w")
         btn.pack(pady=5, fill="x")
+        btn.bind("<Button-3>", lambda e, p=vid_path, w=btn: show_context_menu(e, p, w))  # Right-click for delete
+        video_buttons[vid_path] = btn
+        video_indexer.request(vid_path)
+
+def poll_video_indexes():
+    """Shows poster frames and durations for videos whose index has been built (Tk thread only)."""
+    if not root.winfo_exists():
+        return  # Window closed
+    while not video_indexer.results.empty():
+        vid_path, index = video_indexer.results.get_nowait()
+        btn = video_buttons.get(vid_path)
+        if index is None or btn is None:
+            continue
+        text = f"{os.path.basename(vid_path)}   ({index['duration']:.1f} s)"
+        if index["poster"] and os.path.exists(index["poster"]):
+            poster = ImageTk.PhotoImage(file=index["poster"])
+            video_posters[vid_path] = poster
+            btn.config(image=poster, text=text)
+        else:
+            btn.config(text=text)
+    root.after(100, poll_video_indexes)
 
 # Create title label at the top
 title_label = tk.Label(root, text="Detected Objects Viewer", font=("Arial", 24, "bold"), fg="white", bg="black")
 title_label.pack(pady=10)
 
+# Filter bar: detected class and time range (applied by the Refresh button)
+filter_bar = Frame(root, bg="black")
+filter_bar.pack(pady=5)
+tk.Label(filter_bar, text="Class:", font=("Arial", 14), fg="white", bg="black").pack(side="left", padx=5)
+class_filter = tk.Entry(filter_bar, font=("Arial", 14), width=15)
+class_filter.pack(side="left", padx=5)
+time_range = tk.StringVar(value="All time")
+time_menu = tk.OptionMenu(filter_bar, time_range, *TIME_RANGES)
+time_menu.config(bg="#444", fg="white", highlightthickness=0)
+time_menu.pack(side="left", padx=5)
+class_filter.bind("<Return>", lambda e: [load_images(), load_videos()])
+
 # Section for screenshots
 label_screenshot = tk.Label(root, text="Saved Screenshots", font=("Arial", 18, "bold"), fg="white", bg="black")
 label_screenshot.pack()
-frame_images = create_horizontal_scrollable_frame(root)
+frame_images = create_horizontal_image_strip(root)
+placeholder_image = tk.PhotoImage(width=THUMB_SIZE, height=THUMB_SIZE)  # Shown until a thumbnail is ready
 
 # Section for videos
 label_video = tk.Label(root, text="Saved Videos", font=("Arial", 18, "bold"), fg="white", bg="black")
@@ -156,6 +337,8 @@ btn_refresh.pack(side="bottom", pady=10)
 # Load initial images and videos on launch
 load_images()
 load_videos()
+poll_thumbnails()
+poll_video_indexes()
 
 # Start the Tkinter event loop
-root.mainloop()
+run_mode_window(root)
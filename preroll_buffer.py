@@ -0,0 +1,112 @@
+import collections
+import threading
+import cv2
+
+
+class PrerollBuffer:
+    """
+    Keeps the last few seconds of frames in memory as JPEG bytes, so a clip
+    can start before the moment its trigger fired. Memory use is capped both
+    by time ('seconds') and by total encoded size ('max_bytes').
+    With background=True push() only queues the frame and a helper thread
+    encodes it, so the detection loop does not pay for the JPEG encoding; at
+    most 'max_pending' raw frames wait for it (the oldest is dropped first).
+    Frames must not be changed after push(); call stop() when done.
+    """
+
+    def __init__(self, seconds=3.0, max_bytes=32 * 1024 * 1024, jpeg_quality=85, background=False, max_pending=8):
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.frames = collections.deque()  # (timestamp, jpeg bytes)
+        self.size = 0
+        self.condition = threading.Condition()
+        self.pending = collections.deque(maxlen=max_pending)  # (timestamp, raw frame) not encoded yet
+        self.draining = collections.deque()  # Frames drain() took from 'pending', sent after the encoded ones
+        self.encoding = False  # The helper thread is encoding a frame taken from 'pending'
+        self.stopped = False
+        self.encoder = None
+        if background and seconds > 0:
+            self.encoder = threading.Thread(target=self._encode_loop, daemon=True)
+            self.encoder.start()
+
+    def push(self, frame, timestamp):
+        if self.seconds <= 0:
+            return
+        if self.encoder is None:
+            self._add(timestamp, frame)
+            return
+        with self.condition:
+            self.pending.append((timestamp, frame))
+            self.condition.notify_all()
+
+    def _encode_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                timestamp, frame = self.pending.popleft()
+                self.encoding = True
+            try:
+                self._add(timestamp, frame)
+            finally:
+                with self.condition:
+                    self.encoding = False
+                    self.condition.notify_all()
+
+    def _add(self, timestamp, frame):
+        success, encoded = cv2.imencode(".jpg", frame, self.encode_params)
+        if not success:
+            return
+        with self.condition:
+            self.frames.append((timestamp, encoded))
+            self.size += encoded.nbytes
+
+            # Drop the oldest frames that are too old or push us over the memory cap
+            while self.frames and (timestamp - self.frames[0][0] > self.seconds or self.size > self.max_bytes):
+                _, old = self.frames.popleft()
+                self.size -= old.nbytes
+
+    def drain(self):
+        """
+        Yields (timestamp, frame) for every buffered frame, oldest first, and empties the
+        buffer. Frames are decoded one at a time as they are taken; len() counts the rest.
+        """
+        with self.condition:
+            # A frame the helper thread is encoding is older than the ones still waiting; wait for it.
+            # Frames pushed just before the trigger may not be encoded yet; they are used as they are.
+            while self.encoding:
+                self.condition.wait()
+            self.draining.extend(self.pending)
+            self.pending.clear()
+        while True:
+            with self.condition:
+                if self.frames:
+                    timestamp, encoded = self.frames.popleft()
+                    self.size -= encoded.nbytes
+                    item = None
+                elif self.draining:
+                    item = self.draining.popleft()
+                else:
+                    return
+            yield item if item is not None else (timestamp, cv2.imdecode(encoded, cv2.IMREAD_COLOR))
+
+    def clear(self):
+        with self.condition:
+            self.frames.clear()
+            self.pending.clear()
+            self.draining.clear()
+            self.size = 0
+
+    def stop(self):
+        """ Ends the helper thread (background=True). """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.encoder is not None:
+            self.encoder.join()
+
+    def __len__(self):
+        return len(self.frames) + len(self.pending) + len(self.draining)
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+# Renderer used by the live loops: "lean" (LeanRenderer) or "plot" (ultralytics result.plot())
+LEAN = "lean"
+PLOT = "plot"
+
+# Fixed box colours (BGR), picked by class id
+PALETTE = [(56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207), (10, 249, 72),
+           (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0), (168, 153, 44), (255, 194, 0),
+           (147, 69, 52), (255, 115, 100), (236, 24, 0), (255, 56, 132), (133, 0, 82), (255, 56, 203)]
+
+
+class LeanRenderer:
+    """
+    Cheaper replacement for result.plot() on the live path. It draws into one
+    reused buffer, only draws the classes of interest, and can render at the
+    display size instead of the capture size (boxes are scaled, the frame
+    is resized once).
+    The returned buffer is overwritten by the next render(): copy it before
+    handing it to anything that keeps it (writers, queues).
+    """
+
+    def __init__(self, display_size=None, classes=None, line_width=2, show_labels=True):
+        self.display_size = display_size  # (width, height) or None for the frame's own size
+        self.classes = None if classes is None else np.array(sorted(classes))
+        self.line_width = line_width
+        self.show_labels = show_labels
+        self.buffer = None
+
+    def render(self, frame, result):
+        height, width = frame.shape[:2]
+        out_width, out_height = self.display_size or (width, height)
+        if self.buffer is None or self.buffer.shape != (out_height, out_width, 3):
+            self.buffer = np.empty((out_height, out_width, 3), dtype=np.uint8)
+
+        if (out_width, out_height) == (width, height):
+            np.copyto(self.buffer, frame)
+        else:
+            cv2.resize(frame, (out_width, out_height), dst=self.buffer, interpolation=cv2.INTER_LINEAR)
+
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return self.buffer
+        xyxy = boxes.xyxy.cpu().numpy()
+        cls = boxes.cls.cpu().numpy().astype(int)
+        conf = boxes.conf.cpu().numpy()
+        if self.classes is not None:
+            keep = np.isin(cls, self.classes)
+            xyxy, cls, conf = xyxy[keep], cls[keep], conf[keep]
+
+        # Scale all boxes to the output size in one go
+        xyxy = (xyxy * [out_width / width, out_height / height, out_width / width, out_height / height]).astype(int)
+        for (x1, y1, x2, y2), c, p in zip(xyxy, cls, conf):
+            color = PALETTE[c % len(PALETTE)]
+            cv2.rectangle(self.buffer, (x1, y1), (x2, y2), color, self.line_width)
+            if self.show_labels:
+                text = f"{result.names[c]} {p:.2f}"
+                (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+                top = max(y1 - text_height - 4, 0)
+                cv2.rectangle(self.buffer, (x1, top), (x1 + text_width + 4, top + text_height + 4), color, -1)
+                cv2.putText(self.buffer, text, (x1 + 2, top + text_height + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                            (255, 255, 255), 1, cv2.LINE_AA)
+        return self.buffer
+
+
+def make_renderer(kind, display_size=None, classes=None):
+    """ Returns a function (frame, result) -> annotated image for the chosen renderer. """
+    if kind == PLOT:
+        if display_size is None:
+            return lambda frame, result: result.plot()
+        return lambda frame, result: cv2.resize(result.plot(), display_size)
+    return LeanRenderer(display_size, classes).render
@@ -0,0 +1,172 @@
+import collections
+import hashlib
+import os
+import threading
+import numpy as np
+from model_host import DEFAULT_BACKEND, predict
+
+# Folder holding cached detections between runs
+CACHE_FOLDER = ".detcache"
+
+
+def model_id(weights, backend=None):
+    """
+    Identifies a model for cache keys. The weights file's size and modification
+    time are part of it, so retrained weights under the same name miss the cache.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if os.path.exists(weights):
+        stat = os.stat(weights)
+        return f"{weights}|{backend}|{stat.st_mtime_ns}|{stat.st_size}"
+    return f"{weights}|{backend}"
+
+
+def file_digest(path):
+    """ SHA-256 of a file's bytes; the same picture copied or renamed gives the same digest. """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def detect_settings(imgsz=640, conf=0.25, classes=None):
+    """
+    The settings of a plain detection, as passed to cached_detect() / ResultCache.key()
+    and predict(). Every caller builds them here, so the same image detected the same
+    way gets the same key in every mode.
+    """
+    return {"imgsz": imgsz, "conf": conf, "classes": classes}
+
+
+class ResultCache:
+    """
+    Detection results keyed by image content + model + settings.
+    Recent entries are kept in memory (LRU, 'memory_items' entries); every entry
+    is also written to 'folder' as a small .npy of the boxes (x1, y1, x2, y2,
+    conf, cls), and the least recently used files are deleted once the folder
+    grows past 'max_disk_bytes'. Safe to use from several threads.
+    """
+
+    def __init__(self, model, folder=CACHE_FOLDER, memory_items=256, max_disk_bytes=256 * 1024 * 1024):
+        self.model = model
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = collections.OrderedDict()  # key -> boxes array, least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        # The folder is scanned once; after that the index is kept up to date by put()/get()
+        files = []
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.name.endswith(".npy"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        self.disk = collections.OrderedDict((key, size) for _, key, size in sorted(files))
+        self.disk_bytes = sum(self.disk.values())
+
+    def key(self, digest, **settings):
+        """ Cache key for an image digest (see file_digest) and the inference settings (imgsz, conf, ...). """
+        text = "|".join([digest, self.model] + [f"{k}={settings[k]}" for k in sorted(settings)])
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + ".npy")
+
+    def get(self, key):
+        """ Returns the cached boxes array for 'key', or None. """
+        with self.lock:
+            boxes = self.memory.get(key)
+            if boxes is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return boxes
+            on_disk = key in self.disk
+        if not on_disk:
+            with self.lock:
+                self.misses += 1
+            return None
+        try:
+            boxes = np.load(self._path(key))
+            os.utime(self._path(key))  # Marks it recently used for the next start
+        except (OSError, ValueError):
+            with self.lock:
+                self.disk_bytes -= self.disk.pop(key, 0)
+                self.misses += 1
+            return None
+        with self.lock:
+            if key in self.disk:
+                self.disk.move_to_end(key)
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, boxes)
+        return boxes
+
+    def put(self, key, boxes):
+        boxes = np.asarray(boxes, dtype=np.float32)
+        path = self._path(key)
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            np.save(f, boxes)
+        os.replace(temp, path)  # Readers never see a half-written file
+        size = os.path.getsize(path)
+        with self.lock:
+            self._remember(key, boxes)
+            self.disk_bytes += size - self.disk.pop(key, 0)
+            self.disk[key] = size
+            victims = []
+            while self.disk_bytes > self.max_disk_bytes and len(self.disk) > 1:
+                victim, victim_size = self.disk.popitem(last=False)
+                self.disk_bytes -= victim_size
+                victims.append(victim)
+        for victim in victims:
+            try:
+                os.remove(self._path(victim))
+            except OSError:
+                pass
+
+    def _remember(self, key, boxes):
+        self.memory[key] = boxes
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "memory_entries": len(self.memory), "disk_entries": len(self.disk),
+                    "disk_bytes": self.disk_bytes}
+
+
+def boxes_of(result):
+    """ The (x1, y1, x2, y2, conf, cls) array of one ultralytics Results object. """
+    if result.boxes is None or len(result.boxes) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    return result.boxes.data[:, [0, 1, 2, 3, -2, -1]].cpu().numpy()
+
+
+def make_result(boxes, image, names, path=""):
+    """ Rebuilds a Results object from cached boxes, so .plot() and .boxes work as usual. """
+    import torch
+    from ultralytics.engine.results import Results
+    return Results(orig_img=image, path=path, names=names, boxes=torch.from_numpy(np.asarray(boxes, dtype=np.float32)))
+
+
+def cached_detect(model, cache, image, digest, path="", detect=None, **settings):
+    """
+    Returns [Results] for 'image', from the cache when this content was already
+    detected with the same settings. 'detect' (default: predict(model, image, **settings))
+    runs on a miss; pass another callable for e.g. tiled detection, and give it
+    a distinguishing setting so its results are cached separately.
+    """
+    key = cache.key(digest, **settings)
+    boxes = cache.get(key)
+    if boxes is not None:
+        return [make_result(boxes, image, model.names, path)]
+    results = detect(image) if detect else predict(model, image, **settings)
+    cache.put(key, boxes_of(results[0]))
+    return results
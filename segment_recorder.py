@@ -0,0 +1,218 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# Recording modes for SegmentRecorder
+CONTINUOUS = "continuous"              # Every segment is kept until quota / age removes it
+CONTINUOUS_EVENT = "continuous+event"  # Segments with a detection are protected and removed last
+
+
+class RetentionManager(threading.Thread):
+    """
+    Keeps recorded files under a disk quota and an age limit, deleting the oldest
+    first. The folders are scanned once at start; after that every new file is
+    reported with add(), so enforcing the quota never rescans a folder.
+    Protected files (events) are only deleted after all unprotected ones, or when
+    older than 'protected_max_age_s'. Files ending in one of 'sidecars' (the poster
+    frames of video_index.py) are not counted; on_delete should remove them with
+    their video.
+    """
+
+    def __init__(self, folders, max_bytes, max_age_s=None, protected_max_age_s=None, check_interval=10,
+                 on_delete=None, extensions=(".mp4", ".avi", ".jpg", ".jpeg", ".png"), sidecars=(".poster.jpg",)):
+        super().__init__(daemon=True)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.protected_max_age_s = protected_max_age_s
+        self.check_interval = check_interval
+        self.on_delete = on_delete
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.files = collections.OrderedDict()  # path -> [size or None, created, protected], oldest first
+        self.unsized = set()                    # Files still being written; their size is checked each pass
+        self.total_bytes = 0
+        self.deleted = 0
+        # Which files are protected survives restarts in a small JSON list next to the recordings
+        self.protected_list = os.path.join(folders[0], ".protected.json") if folders else None
+
+        protected = set()
+        if self.protected_list and os.path.exists(self.protected_list):
+            with open(self.protected_list, encoding="utf-8") as f:
+                protected = set(json.load(f))
+        existing = []
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+            for entry in os.scandir(folder):
+                name = entry.name.lower()
+                if entry.is_file() and name.endswith(extensions) and not name.endswith(sidecars):
+                    stat = entry.stat()
+                    existing.append((stat.st_mtime, os.path.abspath(entry.path), stat.st_size))
+        for created, path, size in sorted(existing):
+            self.files[path] = [size, created, path in protected]
+            self.total_bytes += size
+
+    def add(self, path, protected=False):
+        """ Registers a file that is being / has been written. """
+        path = os.path.abspath(path)
+        with self.lock:
+            if path not in self.files:
+                self.files[path] = [None, time.time(), protected]
+                self.unsized.add(path)
+        if protected:
+            self.protect(path)
+
+    def protect(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            entry = self.files.get(path)
+            if entry is None or entry[2]:
+                return
+            entry[2] = True
+            self._save_protected()
+
+    def _save_protected(self):
+        if self.protected_list:
+            with open(self.protected_list, "w", encoding="utf-8") as f:
+                json.dump([path for path, entry in self.files.items() if entry[2]], f)
+
+    def run(self):
+        while not self.stop_event.wait(self.check_interval):
+            self.enforce()
+
+    def enforce(self):
+        """ Updates sizes of files still being written, then deletes until quota and age limits hold. """
+        now = time.time()
+        with self.lock:
+            for path in list(self.unsized):
+                entry = self.files.get(path)
+                if entry is None:
+                    self.unsized.discard(path)
+                    continue
+                if os.path.exists(path):
+                    size = os.path.getsize(path)
+                    self.total_bytes += size - (entry[0] or 0)
+                    entry[0] = size
+                # Stop checking once the file has not been touched for a while
+                if now - entry[1] > 2 * self.check_interval and not self._recently_modified(path, now):
+                    self.unsized.discard(path)
+
+            victims = []
+            for path, (size, created, protected) in self.files.items():
+                limit = self.protected_max_age_s if protected else self.max_age_s
+                if limit is not None and now - created > limit:
+                    victims.append(path)
+            over = self.total_bytes - sum(self.files[p][0] or 0 for p in victims) - self.max_bytes
+            if over > 0:
+                # Oldest unprotected first, then oldest protected; never the files still being written
+                ordered = [p for p, e in self.files.items() if not e[2]] + [p for p, e in self.files.items() if e[2]]
+                for path in ordered:
+                    if over <= 0:
+                        break
+                    if path in victims or path in self.unsized:
+                        continue
+                    victims.append(path)
+                    over -= self.files[path][0] or 0
+
+            changed_protection = False
+            for path in victims:
+                size, _, protected = self.files.pop(path)
+                self.total_bytes -= size or 0
+                changed_protection |= protected
+                try:
+                    os.remove(path)
+                    self.deleted += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Could not delete {path}: {e}")
+            if changed_protection:
+                self._save_protected()
+
+        if self.on_delete:
+            for path in victims:
+                self.on_delete(path)
+
+    @staticmethod
+    def _recently_modified(path, now, seconds=5):
+        try:
+            return now - os.path.getmtime(path) < seconds
+        except OSError:
+            return False
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        with self.lock:
+            return {"files": len(self.files), "total_bytes": self.total_bytes, "quota_bytes": self.max_bytes,
+                    "deleted": self.deleted}
+
+
+class SegmentRecorder:
+    """
+    Continuous recording in fixed-length segments through a MediaWriter.
+    Segments are written at a constant 'fps'; like EventRecorder, frames are
+    repeated or dropped according to their capture timestamps, so a segment
+    plays back in real time whatever rate the camera loop runs at.
+    In CONTINUOUS_EVENT mode mark_event() protects the current segment (and the
+    previous one, which holds the lead-up) from quota deletion.
+    """
+
+    def __init__(self, folder, media_writer, retention, segment_seconds=60, fps=20.0, mode=CONTINUOUS_EVENT):
+        self.folder = os.path.abspath(folder)
+        os.makedirs(self.folder, exist_ok=True)
+        self.media_writer = media_writer
+        self.retention = retention
+        self.segment_seconds = segment_seconds
+        self.fps = fps
+        self.mode = mode
+        self.current = None
+        self.previous = None
+        self.started = 0.0
+        self.pending = None    # Newest frame not written yet
+        self.first_time = 0.0  # Capture time of the segment's first frame
+        self.written = 0       # Output frames written to the segment; frame n stands for first_time + n / fps
+
+    def write(self, frame, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.current is None or timestamp - self.started >= self.segment_seconds:
+            self._rotate(frame, timestamp)
+        if self.pending is None:
+            self.first_time, self.written = timestamp, 0
+        else:
+            # Each output frame shows the newest frame captured at or before its time:
+            # a slow loop repeats frames, a fast one has frames replaced before they are written
+            due = (timestamp - self.first_time) * self.fps - 1e-6
+            while self.written < due:
+                self.media_writer.write_frame(self.current, self.pending)
+                self.written += 1
+        self.pending = frame
+
+    def _finish(self):
+        if self.pending is not None:
+            self.media_writer.write_frame(self.current, self.pending)
+            self.pending = None
+        self.media_writer.close_video(self.current)
+
+    def _rotate(self, frame, timestamp):
+        if self.current is not None:
+            self._finish()
+        name = time.strftime("segment_%Y%m%d_%H%M%S", time.localtime(timestamp)) + f"_{int(timestamp * 1000) % 1000:03d}.mp4"
+        self.previous, self.current = self.current, os.path.join(self.folder, name)
+        self.started = timestamp
+        self.media_writer.open_video(self.current, self.current, 'mp4v', self.fps, (frame.shape[1], frame.shape[0]))
+        self.retention.add(self.current)
+
+    def mark_event(self):
+        if self.mode != CONTINUOUS_EVENT or self.current is None:
+            return
+        self.retention.protect(self.current)
+        if self.previous is not None:
+            self.retention.protect(self.previous)
+
+    def close(self):
+        if self.current is not None:
+            self._finish()
+            self.current = None
@@ -0,0 +1,92 @@
+import pytest
+from adaptive_control import AdaptiveController
+
+
+def run_loop(controller, model_ms_at_640, frames, camera_ms=33.0, other_ms=10.0, start=0.0):
+    """
+    Simulated camera loop: the model costs 'model_ms_at_640' scaled by pixel count,
+    every frame costs 'other_ms' on top, and frames never come faster than the camera.
+    Returns the clock at the end.
+    """
+    now = start
+    for _ in range(frames):
+        run = controller.should_run(now)
+        latency = model_ms_at_640 * (controller.imgsz / 640) ** 2
+        frame_ms = max(camera_ms, other_ms + (latency if run else 0.0))
+        if run:
+            controller.record(latency)
+        now += frame_ms / 1000
+    return now
+
+
+def make(**kwargs):
+    settings = dict(target_ms=80, imgsz=640, patience=5, log_file=None)
+    settings.update(kwargs)
+    return AdaptiveController(**settings)
+
+
+def test_needs_a_budget():
+    with pytest.raises(ValueError):
+        AdaptiveController()
+
+
+def test_stride_runs_the_model_on_every_nth_frame():
+    controller = make()
+    controller.stride = 3
+    assert [controller.should_run(i / 30) for i in range(7)] == [True, False, False, True, False, False, True]
+
+
+def test_holds_when_within_budget():
+    controller = make(imgsz=480)
+    run_loop(controller, model_ms_at_640=110, frames=300)  # About 62 ms at 480 px
+    assert (controller.imgsz, controller.stride) == (480, 1)
+    assert controller.adjustments == 0
+
+
+def test_shrinks_the_size_before_touching_the_stride():
+    controller = make()
+    run_loop(controller, model_ms_at_640=100, frames=300)
+    assert controller.imgsz < 640
+    assert controller.stride == 1
+
+
+def test_stride_grows_only_as_far_as_the_models_share_needs():
+    # Too slow even at 320 px (100 ms), but spread over every other frame it fits the budget
+    controller = make(max_stride=4)
+    run_loop(controller, model_ms_at_640=400, frames=1500)
+    assert controller.imgsz == 320
+    assert controller.stride == 2
+
+
+def test_a_slow_camera_does_not_lower_the_size_or_raise_the_stride():
+    # 10 fps camera against an 80 ms budget; the model itself fits easily
+    controller = make()
+    run_loop(controller, model_ms_at_640=40, frames=600, camera_ms=100.0)
+    assert (controller.imgsz, controller.stride) == (640, 1)
+    assert controller.adjustments == 0
+
+
+def test_steps_back_up_when_the_model_gets_faster():
+    controller = make()
+    now = run_loop(controller, model_ms_at_640=400, frames=1500)
+    run_loop(controller, model_ms_at_640=60, frames=1500, start=now)
+    assert (controller.imgsz, controller.stride) == (640, 1)
+
+
+def test_waits_for_patience_between_changes():
+    controller = make(patience=10)
+    for i in range(9):
+        controller.should_run(i * 0.2)
+        assert not controller.record(200.0)
+    controller.should_run(1.8)
+    assert controller.record(200.0)
+    assert controller.imgsz == 480
+
+
+def test_logs_each_adjustment(tmp_path):
+    log_file = tmp_path / "adaptive.log"
+    controller = make(log_file=str(log_file))
+    run_loop(controller, model_ms_at_640=100, frames=300)
+    lines = log_file.read_text().splitlines()
+    assert len(lines) == controller.adjustments >= 1
+    assert '"reason": "over budget"' in lines[0]
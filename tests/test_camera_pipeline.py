@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from camera_pipeline import DetectionPipeline, DropOldestQueue
+
+
+def test_keeps_only_the_newest_items_and_counts_drops():
+    queue = DropOldestQueue(2)
+    for item in range(5):
+        queue.put(item)
+    assert len(queue) == 2
+    assert queue.dropped == 3
+    assert queue.get(timeout=0) == 3
+    assert queue.get(timeout=0) == 4
+
+
+def test_get_times_out_with_none():
+    queue = DropOldestQueue(1)
+    started = time.perf_counter()
+    assert queue.get(timeout=0.05) is None
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_get_wakes_up_for_a_put_from_another_thread():
+    queue = DropOldestQueue(1)
+    threading.Timer(0.05, queue.put, args=("frame",)).start()
+    assert queue.get(timeout=2) == "frame"
+
+
+def test_close_releases_a_waiting_reader_but_keeps_queued_items():
+    queue = DropOldestQueue(2)
+    queue.put("last")
+    queue.close()
+    assert queue.get(timeout=1) == "last"
+    started = time.perf_counter()
+    assert queue.get(timeout=1) is None
+    assert time.perf_counter() - started < 0.5
+
+
+class FakeSource:
+    """ cv2.VideoCapture stand-in that delivers 'frames' frames. """
+
+    def __init__(self, frames):
+        self.frames = frames
+
+    def read(self):
+        if self.frames == 0:
+            return False, None
+        self.frames -= 1
+        time.sleep(0.01)
+        return True, self.frames
+
+
+def test_pipeline_delivers_results_until_the_source_ends():
+    pipeline = DetectionPipeline(FakeSource(5), lambda frame: [frame]).start()
+    received = []
+    while True:
+        item = pipeline.next_result(timeout=1)
+        if item is None and pipeline.finished():
+            break
+        if item is not None:
+            received.append(item)
+    pipeline.stop()
+    assert received
+    assert all(results == [frame] for _, _, frame, results in received)
+
+
+def test_inference_error_closes_the_pipeline_and_is_raised_to_the_reader():
+    def infer(frame):
+        raise ValueError("model failed")
+
+    pipeline = DetectionPipeline(FakeSource(100), infer).start()
+    pipeline.worker.join(timeout=2)
+    assert not pipeline.worker.is_alive()
+    assert pipeline.finished()
+    with pytest.raises(ValueError, match="model failed"):
+        pipeline.next_result(timeout=0)
+    pipeline.stop()
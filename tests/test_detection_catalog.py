@@ -0,0 +1,81 @@
+import os
+import time
+import pytest
+from detection_catalog import DetectionCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DetectionCatalog(str(tmp_path / "catalog.db"))
+    yield catalog
+    catalog.close()
+
+
+def touch(path, mtime=None):
+    with open(path, "wb"):
+        pass
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def record(class_name, confidence=0.9):
+    return {"class_name": class_name, "confidence": confidence, "x1": 0, "y1": 0, "x2": 10, "y2": 10}
+
+
+def test_reserve_numbers_files_and_never_reuses_a_number(catalog, tmp_path):
+    first_id, first = catalog.reserve("screenshot", tmp_path, "screenshot_person", ".jpg")
+    catalog.remove(first)
+    second_id, second = catalog.reserve("screenshot", tmp_path, "screenshot_person", ".jpg")
+    assert second_id > first_id
+    assert first != second
+    assert os.path.basename(second) == f"screenshot_person_{second_id:06d}.jpg"
+
+
+def test_query_filters_by_kind_and_detected_class(catalog, tmp_path):
+    shot_id, _ = catalog.reserve("screenshot", tmp_path, "screenshot_person", ".jpg", object_name="person")
+    clip_id, _ = catalog.reserve("video", tmp_path, "video_dog", ".mp4", object_name="dog")
+    catalog.add_detections(clip_id, [record("dog"), record("cat")])
+
+    assert [m["id"] for m in catalog.query(kind="video")] == [clip_id]
+    # Found through a stored detection, and through the object name it was saved for
+    assert [m["id"] for m in catalog.query(class_name="CAT")] == [clip_id]
+    assert [m["id"] for m in catalog.query(class_name="person")] == [shot_id]
+    assert [d["class_name"] for d in catalog.detections_for(clip_id)] == ["dog", "cat"]
+
+
+def test_query_filters_by_time_newest_first(catalog, tmp_path):
+    folder = tmp_path / "shots"
+    folder.mkdir()
+    now = time.time()
+    touch(folder / "screenshot_person_1.jpg", now - 7200)
+    touch(folder / "screenshot_person_2.jpg", now - 60)
+    catalog.import_folder("screenshot", str(folder), (".jpg",))
+
+    names = [os.path.basename(m["path"]) for m in catalog.query()]
+    assert names == ["screenshot_person_2.jpg", "screenshot_person_1.jpg"]
+    recent = catalog.query(since=now - 3600)
+    assert [os.path.basename(m["path"]) for m in recent] == ["screenshot_person_2.jpg"]
+
+
+def test_import_folder_adds_only_files_not_listed_yet(catalog, tmp_path):
+    folder = tmp_path / "shots"
+    folder.mkdir()
+    touch(folder / "screenshot_person_1.jpg")
+    touch(folder / "notes.txt")
+    assert catalog.import_folder("screenshot", str(folder), (".jpg",)) == 1
+
+    # A file the catalog already knows (saved through reserve) and one saved before the catalog existed
+    _, reserved = catalog.reserve("screenshot", str(folder), "screenshot_dog", ".jpg")
+    touch(reserved)
+    touch(folder / "screenshot_cell_phone_2.jpg")
+    assert catalog.import_folder("screenshot", str(folder), (".jpg",)) == 1
+    assert catalog.import_folder("screenshot", str(folder), (".jpg",)) == 0
+
+    assert len(catalog.query(kind="screenshot")) == 3
+    assert [m["object_name"] for m in catalog.query(class_name="cell_phone")] == ["cell_phone"]
+
+
+def test_import_folder_ignores_a_missing_folder(catalog, tmp_path):
+    assert catalog.import_folder("video", str(tmp_path / "missing"), (".mp4",)) == 0
+    assert catalog.is_empty()
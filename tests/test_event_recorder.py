@@ -0,0 +1,95 @@
+import os
+import signal
+import time
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+from event_recorder import EventRecorder  # noqa: E402
+
+SHAPE = (48, 64, 3)
+
+
+@pytest.fixture
+def recorder():
+    recorder = EventRecorder(SHAPE, fps=10.0, slots=8, post_roll_s=1.0, min_clip_s=2.0, max_clip_s=5.0)
+    yield recorder
+    if recorder.process.poll() is None:
+        recorder.stop()
+
+
+def frame(value):
+    return np.full(SHAPE, value, dtype=np.uint8)
+
+
+def frame_count(path):
+    capture = cv2.VideoCapture(str(path))
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def test_clip_length_follows_capture_timestamps_not_write_speed(recorder, tmp_path):
+    # 3 s of capture time written as fast as possible, and the same span with only 4 frames
+    fast, slow = tmp_path / "fast.mp4", tmp_path / "slow.mp4"
+    recorder.start(str(fast), 0.0)
+    for i in range(90):
+        recorder.write(frame(i), i / 30, block=True)
+    recorder.close_clip()
+    recorder.start(str(slow), 100.0)
+    for t in (100.0, 101.0, 102.0, 103.0):
+        recorder.write(frame(int(t)), t, block=True)
+    recorder.stop()
+    # 10 fps output: about 30 frames either way (the newest frame is written once more at the end)
+    assert abs(frame_count(fast) - 30) <= 1
+    assert abs(frame_count(slow) - 31) <= 1
+
+
+def test_preroll_frames_open_the_clip(recorder, tmp_path):
+    path = tmp_path / "preroll.mp4"
+    recorder.start(str(path), 10.0, preroll=[(9.0 + i / 10, frame(10)) for i in range(10)])
+    recorder.write(frame(200), 10.0, block=True)
+    recorder.stop()
+    assert abs(frame_count(path) - 11) <= 1
+
+
+def test_clip_lasts_at_least_min_clip_s(recorder, tmp_path):
+    recorder.start(str(tmp_path / "a.mp4"), 0.0)
+    assert recorder.update(False, 1.5) is None  # Trigger gone, but shorter than min_clip_s
+    assert recorder.update(False, 2.0) == str(tmp_path / "a.mp4")
+    assert not recorder.recording
+
+
+def test_clip_ends_post_roll_after_the_last_trigger(recorder, tmp_path):
+    recorder.start(str(tmp_path / "b.mp4"), 0.0)
+    assert recorder.update(True, 2.5) is None
+    assert recorder.update(False, 3.4) is None
+    assert recorder.update(False, 3.5) == str(tmp_path / "b.mp4")
+
+
+def test_clip_is_cut_at_max_clip_s(recorder, tmp_path):
+    recorder.start(str(tmp_path / "c.mp4"), 0.0)
+    assert recorder.update(True, 4.9) is None
+    assert recorder.update(True, 5.0) == str(tmp_path / "c.mp4")
+    assert recorder.clips == 1
+
+
+def test_frames_are_ignored_when_no_clip_is_open(recorder):
+    assert not recorder.write(frame(0), 0.0)
+    assert recorder.update(True, 0.0) is None
+
+
+@pytest.mark.skipif(os.name != "posix", reason="sends a POSIX signal")
+def test_ctrl_c_does_not_break_the_open_clip(recorder, tmp_path):
+    path = tmp_path / "interrupted.mp4"
+    recorder.start(str(path), 0.0)
+    for i in range(20):
+        recorder.write(frame(i), i / 10, block=True)
+    os.kill(recorder.process.pid, signal.SIGINT)  # What Ctrl+C would deliver to the encoder
+    time.sleep(0.2)
+    assert recorder.process.poll() is None
+    recorder.stop()
+    assert recorder.process.returncode == 0
+    assert abs(frame_count(path) - 20) <= 1
@@ -0,0 +1,42 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+from motion_gate import MotionGate, reuse_results  # noqa: E402
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeResult:
+    """ The part of ultralytics' Results that reuse_results() relies on. """
+
+    def __init__(self, orig_img, path, names, boxes=None):
+        self.orig_img = orig_img
+        self.path = path
+        self.names = names
+        self.boxes = FakeBoxes(boxes) if boxes is not None else None
+
+
+def frame(value):
+    return np.full((120, 160, 3), value, dtype=np.uint8)
+
+
+def test_static_frames_are_skipped_until_max_skip():
+    gate = MotionGate(max_skip=3)
+    assert gate.should_run(frame(0))
+    assert [gate.should_run(frame(0)) for _ in range(4)] == [False, False, False, True]
+    assert gate.should_run(frame(200))
+
+
+def test_reuse_results_copies_instead_of_changing_the_old_results():
+    old_frame, new_frame = frame(0), frame(50)
+    boxes = np.array([[1, 2, 3, 4, 0.9, 0]], dtype=np.float32)
+    original = FakeResult(old_frame, "camera", {0: "person"}, boxes)
+    (reused,) = reuse_results([original], new_frame)
+    assert reused is not original
+    assert reused.orig_img is new_frame
+    assert original.orig_img is old_frame
+    assert reused.boxes.data is boxes
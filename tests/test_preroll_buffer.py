@@ -0,0 +1,79 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+from preroll_buffer import PrerollBuffer  # noqa: E402
+
+
+def noise_frame(seed, shape=(120, 160, 3)):
+    # Noise does not compress, so every frame costs about the same number of JPEG bytes
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def test_keeps_only_the_last_seconds():
+    buffer = PrerollBuffer(seconds=1.0, max_bytes=64 * 1024 * 1024)
+    for i in range(30):
+        buffer.push(noise_frame(i), i * 0.1)
+    timestamps = [t for t, _ in buffer.drain()]
+    assert timestamps[0] >= 2.9 - 1.0 - 1e-9
+    assert timestamps[-1] == pytest.approx(2.9)
+
+
+def test_byte_cap_drops_the_oldest_frames():
+    probe = PrerollBuffer(seconds=60)
+    probe.push(noise_frame(0), 0.0)
+    one_frame = probe.size  # Encoded size of one frame
+
+    buffer = PrerollBuffer(seconds=60, max_bytes=int(one_frame * 3.5))
+    for i in range(10):
+        buffer.push(noise_frame(i), float(i))
+        assert buffer.size <= buffer.max_bytes
+    assert 1 <= len(buffer) <= 4
+    assert [t for t, _ in buffer.drain()][-1] == 9.0
+
+
+def test_drain_decodes_oldest_first_and_empties_the_buffer():
+    buffer = PrerollBuffer(seconds=10)
+    for i in range(3):
+        buffer.push(np.full((48, 64, 3), 80 * i, dtype=np.uint8), float(i))
+    drained = list(buffer.drain())
+    assert [t for t, _ in drained] == [0.0, 1.0, 2.0]
+    assert drained[2][1].shape == (48, 64, 3)
+    assert abs(int(drained[2][1].mean()) - 160) <= 3  # JPEG is lossy, but a flat frame stays flat
+    assert len(buffer) == 0 and buffer.size == 0
+
+
+def test_zero_seconds_keeps_nothing():
+    buffer = PrerollBuffer(seconds=0)
+    buffer.push(noise_frame(0), 0.0)
+    assert len(buffer) == 0
+
+
+def test_background_encoding_keeps_every_frame_in_order():
+    buffer = PrerollBuffer(seconds=10, background=True, max_pending=100)
+    for i in range(20):
+        buffer.push(np.full((48, 64, 3), 10 * i, dtype=np.uint8), float(i))
+    drained = list(buffer.drain())
+    buffer.stop()
+    assert [t for t, _ in drained] == [float(i) for i in range(20)]
+    assert all(frame.shape == (48, 64, 3) for _, frame in drained)
+    assert not buffer.encoder.is_alive()
+
+
+def test_background_encoding_drops_the_oldest_waiting_frames():
+    buffer = PrerollBuffer(seconds=10, background=True, max_pending=2)
+    buffer.stop()  # No encoding: every frame stays waiting
+    for i in range(5):
+        buffer.push(noise_frame(i), float(i))
+    assert [t for t, _ in buffer.drain()] == [3.0, 4.0]
+
+
+def test_drain_takes_frames_one_at_a_time():
+    buffer = PrerollBuffer(seconds=10)
+    for i in range(3):
+        buffer.push(noise_frame(i), float(i))
+    frames = buffer.drain()
+    assert next(frames)[0] == 0.0
+    assert len(buffer) == 2  # The rest can still be counted and dropped with clear()
+    buffer.clear()
+    assert list(frames) == []
@@ -0,0 +1,88 @@
+import os
+import pytest
+
+np = pytest.importorskip("numpy")
+from result_cache import ResultCache, detect_settings, file_digest, model_id  # noqa: E402
+
+
+def boxes(*rows):
+    return np.array(rows, dtype=np.float32).reshape(-1, 6)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache("yolov8n.pt|torch", folder=str(tmp_path / "cache"))
+
+
+def test_key_depends_on_content_model_and_settings(cache, tmp_path):
+    key = cache.key("abc", imgsz=640, conf=0.25)
+    assert key == cache.key("abc", conf=0.25, imgsz=640)  # Argument order does not matter
+    assert key != cache.key("abd", imgsz=640, conf=0.25)
+    assert key != cache.key("abc", imgsz=640, conf=0.5)
+    assert key != cache.key("abc", imgsz=640, conf=0.25, classes=[0])
+    other_model = ResultCache("yolov8s.pt|torch", folder=str(tmp_path / "cache"))
+    assert key != other_model.key("abc", imgsz=640, conf=0.25)
+
+
+def test_file_digest_follows_content_not_name(tmp_path):
+    first, renamed, edited = tmp_path / "a.jpg", tmp_path / "b.jpg", tmp_path / "c.jpg"
+    first.write_bytes(b"same picture")
+    renamed.write_bytes(b"same picture")
+    edited.write_bytes(b"other picture")
+    assert file_digest(str(first)) == file_digest(str(renamed))
+    assert file_digest(str(first)) != file_digest(str(edited))
+
+
+def test_model_id_changes_when_the_weights_file_changes(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"v1")
+    before = model_id(str(weights), "torch")
+    weights.write_bytes(b"version 2")
+    assert model_id(str(weights), "torch") != before
+    assert model_id(str(weights), "onnx") != model_id(str(weights), "torch")
+
+
+def test_put_then_get_from_memory_and_from_disk(cache, tmp_path):
+    stored = boxes([1, 2, 3, 4, 0.9, 0])
+    key = cache.key("abc", imgsz=640)
+    assert cache.get(key) is None
+    cache.put(key, stored)
+    assert np.array_equal(cache.get(key), stored)
+
+    # A new cache on the same folder (a later run) finds it on disk
+    reopened = ResultCache("yolov8n.pt|torch", folder=cache.folder)
+    assert np.array_equal(reopened.get(key), stored)
+    stats = reopened.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_memory_is_a_bounded_lru(tmp_path):
+    cache = ResultCache("m", folder=str(tmp_path / "cache"), memory_items=2)
+    for name in ("a", "b", "c"):
+        cache.put(name, boxes())
+    assert list(cache.memory) == ["b", "c"]
+    cache.get("a")  # From disk, and now the most recently used
+    assert list(cache.memory) == ["c", "a"]
+
+
+def test_disk_cap_removes_least_recently_used_files(tmp_path):
+    folder = tmp_path / "cache"
+    probe = ResultCache("m", folder=str(folder))
+    probe.put("probe", boxes([1, 2, 3, 4, 0.5, 1]))
+    one_file = probe.disk_bytes
+    os.remove(probe._path("probe"))
+
+    cache = ResultCache("m", folder=str(folder), max_disk_bytes=one_file * 2)
+    for name in ("a", "b", "c"):
+        cache.put(name, boxes([1, 2, 3, 4, 0.5, 1]))
+    assert sorted(cache.disk) == ["b", "c"]
+    assert not os.path.exists(cache._path("a"))
+    assert cache.disk_bytes <= one_file * 2
+
+
+def test_image_window_and_batch_mode_build_the_same_key(cache):
+    # opt1 passes detect_settings(640, 0.25); batch_detect builds them from its imgsz / conf defaults
+    gui_key = cache.key("abc", **detect_settings(640, 0.25))
+    batch_key = cache.key("abc", **detect_settings(imgsz=640, conf=0.25))
+    assert gui_key == batch_key
+    assert gui_key != cache.key("abc", **detect_settings(640, 0.25, classes=[0]))
@@ -0,0 +1,60 @@
+import os
+from segment_recorder import RetentionManager, SegmentRecorder
+
+
+class FakeFrame:
+    shape = (48, 64, 3)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeWriter:
+    """ Records the MediaWriter calls instead of encoding anything. """
+
+    def __init__(self):
+        self.frames = {}
+
+    def open_video(self, key, path, fourcc, fps, size):
+        self.frames[key] = []
+
+    def write_frame(self, key, frame):
+        self.frames[key].append(frame.name)
+
+    def close_video(self, key):
+        pass
+
+
+def test_scan_skips_poster_sidecars(tmp_path):
+    (tmp_path / "clip.mp4").write_bytes(b"x" * 100)
+    (tmp_path / "clip.mp4.poster.jpg").write_bytes(b"x" * 10)
+    (tmp_path / "clip.mp4.index.json").write_bytes(b"{}")
+    (tmp_path / "shot.jpg").write_bytes(b"x" * 20)
+    retention = RetentionManager([str(tmp_path)], max_bytes=10 ** 6)
+    assert sorted(os.path.basename(p) for p in retention.files) == ["clip.mp4", "shot.jpg"]
+    assert retention.total_bytes == 120
+
+
+def test_segments_are_paced_by_capture_time(tmp_path):
+    writer = FakeWriter()
+    retention = RetentionManager([str(tmp_path)], max_bytes=10 ** 6)
+    recorder = SegmentRecorder(str(tmp_path), writer, retention, segment_seconds=60, fps=10.0)
+    # A 5 fps camera at 10 fps output: every frame is shown twice
+    for i in range(5):
+        recorder.write(FakeFrame(i), 100.0 + i * 0.2)
+    recorder.close()
+    (frames,) = writer.frames.values()
+    assert frames == [0, 0, 1, 1, 2, 2, 3, 3, 4]
+
+
+def test_fast_camera_frames_are_dropped_and_segments_rotate(tmp_path):
+    writer = FakeWriter()
+    retention = RetentionManager([str(tmp_path)], max_bytes=10 ** 6)
+    recorder = SegmentRecorder(str(tmp_path), writer, retention, segment_seconds=1, fps=2.0)
+    # A 4 fps camera for 2 s at 2 fps output, in 1 s segments
+    for i in range(8):
+        recorder.write(FakeFrame(i), 100.0 + i * 0.25)
+    recorder.close()
+    first, second = (writer.frames[key] for key in sorted(writer.frames))
+    assert first == [0, 2, 3]
+    assert second == [4, 6, 7]
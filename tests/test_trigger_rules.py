@@ -0,0 +1,77 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from trigger_rules import DEFAULT_MIN_CONFIDENCE, TriggerRule  # noqa: E402
+
+NAMES = {0: "person", 1: "bicycle", 16: "dog", 67: "cell phone"}
+
+
+class FakeTensor:
+    """ Enough of a torch tensor for the rule: .cpu().numpy(). """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class FakeBoxes:
+    """ Stands in for ultralytics Boxes: one (class id, confidence) pair per box. """
+
+    def __init__(self, *boxes):
+        self.cls = FakeTensor([c for c, _ in boxes])
+        self.conf = FakeTensor([p for _, p in boxes])
+
+    def __len__(self):
+        return len(self.cls.values)
+
+
+def test_parse_reads_counts_confidences_and_mode():
+    rule = TriggerRule.parse("ALL: Person>=2@0.8, cell phone", NAMES)
+    assert rule.mode == "all"
+    assert rule.classes == [0, 67]
+    assert list(rule.min_counts) == [2, 1]
+    assert list(rule.min_confidences) == pytest.approx([0.8, DEFAULT_MIN_CONFIDENCE])
+    assert rule.label() == "person+cell-phone"
+
+
+@pytest.mark.parametrize("text", ["", " , ", "unicorn", "person>=", "person@high"])
+def test_parse_rejects_bad_rules(text):
+    with pytest.raises(ValueError):
+        TriggerRule.parse(text, NAMES)
+
+
+def test_any_mode_needs_one_condition():
+    rule = TriggerRule.parse("person>=2, dog", NAMES)
+    assert rule.evaluate(FakeBoxes((16, 0.9)))
+    assert not rule.evaluate(FakeBoxes((0, 0.9)))
+    assert rule.evaluate(FakeBoxes((0, 0.9), (0, 0.7)))
+
+
+def test_all_mode_needs_every_condition():
+    rule = TriggerRule.parse("all: person, dog", NAMES)
+    assert not rule.evaluate(FakeBoxes((0, 0.9)))
+    assert rule.evaluate(FakeBoxes((0, 0.9), (16, 0.9)))
+
+
+def test_boxes_below_the_condition_confidence_do_not_count():
+    rule = TriggerRule.parse("person>=2@0.8", NAMES)
+    assert not rule.evaluate(FakeBoxes((0, 0.95), (0, 0.75)))
+    assert rule.evaluate(FakeBoxes((0, 0.95), (0, 0.85)))
+
+
+def test_no_boxes_never_trigger():
+    rule = TriggerRule.parse("person", NAMES)
+    assert not rule.evaluate(None)
+    assert not rule.evaluate(FakeBoxes())
+
+
+def test_matches_marks_the_boxes_that_meet_a_condition():
+    rule = TriggerRule.parse("person@0.5, dog@0.9", NAMES)
+    boxes = FakeBoxes((0, 0.6), (16, 0.8), (1, 0.99), (16, 0.95))
+    assert list(rule.matches(boxes)) == [True, False, False, True]
+    assert len(rule.matches(FakeBoxes())) == 0
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# Folder holding generated thumbnails between runs
+CACHE_FOLDER = ".thumbnails"
+
+
+class ThumbnailCache:
+    """
+    Persistent thumbnail cache. Thumbnails are stored on disk under a key made
+    of the file's path, modification time and size, so an edited or replaced
+    file gets a new thumbnail automatically. Generation runs in a worker pool;
+    finished (path, PIL image) pairs are put on 'results' for the GUI thread
+    to pick up (Tk images must be created on the Tk thread).
+    """
+
+    def __init__(self, size=(200, 200), cache_folder=CACHE_FOLDER, workers=4):
+        self.size = size
+        self.cache_folder = cache_folder
+        os.makedirs(cache_folder, exist_ok=True)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.results = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def cache_path(self, path):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+        return os.path.join(self.cache_folder, hashlib.sha1(key.encode()).hexdigest() + ".png")
+
+    def request(self, path):
+        """ Queues a thumbnail for 'path' unless one is already on its way. """
+        with self.lock:
+            if path in self.pending:
+                return
+            self.pending.add(path)
+        self.pool.submit(self._load, path)
+
+    def _load(self, path):
+        image = None
+        try:
+            cached = self.cache_path(path)
+            if os.path.exists(cached):
+                image = Image.open(cached)
+                image.load()
+            else:
+                image = Image.open(path)
+                image.draft("RGB", self.size)  # Lets JPEG decode at reduced size
+                image.thumbnail(self.size)
+                if image.mode not in ("RGB", "RGBA", "L"):
+                    image = image.convert("RGB")
+                image.save(cached)
+        except Exception as e:
+            print(f"Error loading image {path}: {e}")
+        with self.lock:
+            self.pending.discard(path)
+        self.results.put((path, image))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,115 @@
+import json
+import os
+import cv2
+import numpy as np
+import torch
+from torchvision.ops import batched_nms
+from ultralytics.engine.results import Results
+from model_host import predict
+
+# Regions of interest per camera / source: {"0": [[[x, y], [x, y], ...], ...], "clip.mp4": [...]}
+ROI_FILE = "rois.json"
+
+
+def load_rois(source, path=ROI_FILE):
+    """ Returns the ROI polygons configured for a camera / source (empty list if none). """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        rois = json.load(f)
+    return [np.array(polygon, dtype=np.int32) for polygon in rois.get(str(source), [])]
+
+
+def roi_mask(shape, polygons):
+    """ uint8 mask (255 inside any polygon) for an image of the given shape. """
+    mask = np.zeros(shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, polygons, 255)
+    return mask
+
+
+def boxes_in_mask(boxes, mask):
+    """ Indices of the boxes (ultralytics Boxes) whose centre lies inside 'mask' (see roi_mask). """
+    if boxes is None or len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    xyxy = boxes.xyxy.cpu().numpy()
+    cx = np.clip(((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(int), 0, mask.shape[1] - 1)
+    cy = np.clip(((xyxy[:, 1] + xyxy[:, 3]) / 2).astype(int), 0, mask.shape[0] - 1)
+    return np.flatnonzero(mask[cy, cx] > 0)
+
+
+def make_tiles(height, width, tile=640, overlap=0.2):
+    """ Returns (x0, y0, x1, y1) tiles of at most tile x tile pixels covering the image with the given overlap. """
+    step = max(1, int(tile * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile:
+            return [0]
+        positions = list(range(0, length - tile, step))
+        return positions + [length - tile]  # Last tile flush with the edge
+
+    return [(x, y, min(x + tile, width), min(y + tile, height)) for y in starts(height) for x in starts(width)]
+
+
+def roi_regions(shape, polygons):
+    """ Bounding rectangles of the ROI polygons, clipped to the image. """
+    height, width = shape[:2]
+    regions = []
+    for polygon in polygons:
+        x, y, w, h = cv2.boundingRect(polygon)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        if x1 > x0 and y1 > y0:
+            regions.append((x0, y0, x1, y1))
+    return regions
+
+
+def detect_regions(model, image, regions, imgsz=640, conf=0.25, iou=0.5, mask=None, classes=None,
+                   include_full_image=False):
+    """
+    Runs the model on several crops of 'image' in one batched call, maps the boxes
+    back to image coordinates and merges duplicates from overlapping crops with
+    class-wise NMS. With 'mask', crops outside it are skipped and boxes whose
+    centre lies outside it are dropped. Returns [Results] like model(image).
+    """
+    if mask is not None:
+        regions = [r for r in regions if mask[r[1]:r[3], r[0]:r[2]].any()]
+    crops = [image[y0:y1, x0:x1] for x0, y0, x1, y1 in regions]
+    offsets = [(x0, y0) for x0, y0, _, _ in regions]
+    if include_full_image:
+        # Catches objects too large for a single tile
+        crops.append(image)
+        offsets.append((0, 0))
+
+    all_boxes = []
+    if crops:
+        for result, (dx, dy) in zip(predict(model, crops, imgsz=imgsz, conf=conf, classes=classes), offsets):
+            boxes = result.boxes.data.cpu().clone()  # x1, y1, x2, y2, conf, cls
+            boxes[:, [0, 2]] += dx
+            boxes[:, [1, 3]] += dy
+            all_boxes.append(boxes)
+    boxes = torch.cat(all_boxes) if all_boxes else torch.zeros((0, 6))
+
+    if mask is not None and len(boxes):
+        cx = ((boxes[:, 0] + boxes[:, 2]) / 2).long().clamp(0, mask.shape[1] - 1)
+        cy = ((boxes[:, 1] + boxes[:, 3]) / 2).long().clamp(0, mask.shape[0] - 1)
+        boxes = boxes[torch.from_numpy(mask[cy.numpy(), cx.numpy()] > 0)]
+    if len(boxes):
+        keep = batched_nms(boxes[:, :4], boxes[:, 4], boxes[:, 5].long(), iou)
+        boxes = boxes[keep]
+
+    return [Results(orig_img=image, path="", names=model.names, boxes=boxes)]
+
+
+def tiled_detect(model, image, tile=640, overlap=0.2, conf=0.25, iou=0.5, polygons=None, classes=None):
+    """ Detects small objects in large images by running the model on overlapping tiles (optionally only inside ROIs). """
+    height, width = image.shape[:2]
+    mask = roi_mask(image.shape, polygons) if polygons else None
+    return detect_regions(model, image, make_tiles(height, width, tile, overlap), tile, conf, iou, mask, classes,
+                          include_full_image=True)
+
+
+def roi_detect(model, image, polygons, imgsz=640, conf=0.25, iou=0.5, classes=None, mask=None):
+    """ Runs the model only on the ROI polygons' bounding boxes (one batched call). """
+    if mask is None:
+        mask = roi_mask(image.shape, polygons)
+    return detect_regions(model, image, roi_regions(image.shape, polygons), imgsz, conf, iou, mask, classes)
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+# How TrackShotSelector picks the best frame of a track
+CONFIDENCE = "confidence"  # Highest detection confidence
+SHARPNESS = "sharpness"    # Sharpest crop of the object (variance of the Laplacian), weighted by confidence
+
+
+def sharpness(frame, box):
+    """ Variance of the Laplacian inside 'box' (x1, y1, x2, y2); higher means less motion blur. """
+    x1, y1, x2, y2 = (int(v) for v in box)
+    crop = frame[max(y1, 0):max(y2, 0), max(x1, 0):max(x2, 0)]
+    if crop.size == 0:
+        return 0.0
+    return float(cv2.Laplacian(cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var())
+
+
+class TrackShotSelector:
+    """
+    Turns tracked detections into one screenshot per track id. While a track
+    is new, its best frame is kept for 'window_s' seconds (or until the track
+    is lost for 'lost_s'); then that frame is handed out once and the id is
+    never shot again. Ids not seen for 'forget_s' are forgotten, so memory
+    stays bounded on long runs.
+    """
+
+    def __init__(self, window_s=1.0, score=CONFIDENCE, lost_s=0.5, forget_s=300):
+        self.window_s = window_s
+        self.score = score
+        self.lost_s = lost_s
+        self.forget_s = forget_s
+        self.candidates = {}  # track id -> best shot so far
+        self.done = {}        # track id -> last time seen, for ids already shot
+        self.shots = 0
+
+    def update(self, frame, result, timestamp, keep=None):
+        """
+        Feeds one frame and its tracked Results. 'keep' is an optional boolean
+        mask of the boxes that count (e.g. TriggerRule.matches). Returns the
+        shots that are ready: dicts with track_id, class_id, confidence, score,
+        timestamp, frame and result (of the frame the shot was taken from).
+        """
+        boxes = result.boxes
+        if boxes is not None and boxes.id is not None and len(boxes):
+            ids = boxes.id.cpu().numpy().astype(int)
+            conf = boxes.conf.cpu().numpy()
+            cls = boxes.cls.cpu().numpy().astype(int)
+            xyxy = boxes.xyxy.cpu().numpy()
+            frame_copy = None
+            for i in np.flatnonzero(keep) if keep is not None else range(len(ids)):
+                track_id = ids[i]
+                if track_id in self.done:
+                    self.done[track_id] = timestamp
+                    continue
+                score = float(conf[i])
+                if self.score == SHARPNESS:
+                    score *= sharpness(frame, xyxy[i])
+                best = self.candidates.get(track_id)
+                if best is None or score > best["score"]:
+                    if frame_copy is None:
+                        frame_copy = frame.copy()  # One copy per frame, shared by its tracks
+                    self.candidates[track_id] = {
+                        "track_id": int(track_id), "class_id": int(cls[i]), "confidence": float(conf[i]),
+                        "score": score, "timestamp": timestamp, "frame": frame_copy, "result": result,
+                        "first_seen": best["first_seen"] if best else timestamp, "last_seen": timestamp,
+                    }
+                else:
+                    best["last_seen"] = timestamp
+
+        ready = [track_id for track_id, shot in self.candidates.items()
+                 if timestamp - shot["first_seen"] >= self.window_s or timestamp - shot["last_seen"] >= self.lost_s]
+        for track_id, seen in list(self.done.items()):
+            if timestamp - seen > self.forget_s:
+                del self.done[track_id]
+        return [self._release(track_id, timestamp) for track_id in ready]
+
+    def flush(self, timestamp):
+        """ Hands out every pending shot, e.g. when the camera stops. """
+        return [self._release(track_id, timestamp) for track_id in list(self.candidates)]
+
+    def _release(self, track_id, timestamp):
+        self.done[track_id] = timestamp
+        self.shots += 1
+        return self.candidates.pop(track_id)
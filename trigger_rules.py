@@ -0,0 +1,87 @@
+import re
+import numpy as np
+
+# Confidence a detection needs when a condition does not give its own
+DEFAULT_MIN_CONFIDENCE = 0.6
+
+# Short help shown next to the object name box
+RULE_HELP = ("Trigger rules: 'person', 'person>=2', 'person@0.8', 'person>=2@0.8, dog'\n"
+             "Prefix with 'all:' to require every class (default 'any:' = at least one)")
+
+CONDITION_PATTERN = re.compile(r"^\s*(?P<name>[a-zA-Z][a-zA-Z ]*?)\s*(?:>=\s*(?P<count>\d+))?\s*(?:@\s*(?P<conf>[0-9.]+))?\s*$")
+
+
+class TriggerRule:
+    """
+    Decides whether a frame's detections should trigger a screenshot / clip.
+    Each condition is (class id, minimum count, minimum confidence); in "any"
+    mode one satisfied condition is enough, in "all" mode every one must be.
+    Evaluation works on the whole box tensor at once instead of per box.
+    """
+
+    def __init__(self, class_ids, names, min_counts, min_confidences, mode="any"):
+        self.class_ids = np.array(class_ids, dtype=np.int64)
+        self.names = list(names)
+        self.min_counts = np.array(min_counts, dtype=np.int64)
+        self.min_confidences = np.array(min_confidences, dtype=np.float32)
+        self.mode = mode
+
+    @classmethod
+    def parse(cls, text, model_names):
+        """
+        Builds a rule from text like "all: person>=2@0.7, dog".
+        'model_names' is the model's {id: name} dict. Raises ValueError for bad input.
+        """
+        text = text.strip()
+        mode = "any"
+        prefix = re.match(r"^(all|any)\s*:", text, re.IGNORECASE)
+        if prefix:
+            mode = prefix.group(1).lower()
+            text = text[prefix.end():]
+
+        ids_by_name = {name.lower(): class_id for class_id, name in model_names.items()}
+        class_ids, names, counts, confidences = [], [], [], []
+        for part in text.split(","):
+            if not part.strip():
+                continue
+            match = CONDITION_PATTERN.match(part)
+            if not match:
+                raise ValueError(f"Cannot understand '{part.strip()}'")
+            name = match.group("name").strip().lower()
+            if name not in ids_by_name:
+                raise ValueError(f"'{name}' is not an object the model can detect")
+            class_ids.append(ids_by_name[name])
+            names.append(name)
+            counts.append(int(match.group("count") or 1))
+            confidences.append(float(match.group("conf") or DEFAULT_MIN_CONFIDENCE))
+        if not class_ids:
+            raise ValueError("Enter at least one object name")
+        return cls(class_ids, names, counts, confidences, mode)
+
+    @property
+    def classes(self):
+        """ Class ids to pass to the model (classes=...) so other classes are filtered out during inference. """
+        return sorted(set(int(c) for c in self.class_ids))
+
+    def label(self):
+        """ Short name for file names, e.g. 'person+cell-phone'. """
+        return "+".join(name.replace(" ", "-") for name in dict.fromkeys(self.names))
+
+    def matches(self, boxes):
+        """ Boolean array: which boxes meet some condition's class and confidence. """
+        if boxes is None or len(boxes) == 0:
+            return np.zeros(0, dtype=bool)
+        cls = boxes.cls.cpu().numpy()
+        conf = boxes.conf.cpu().numpy()
+        return ((cls[:, None] == self.class_ids[None, :]) & (conf[:, None] >= self.min_confidences[None, :])).any(axis=1)
+
+    def evaluate(self, boxes):
+        """ Returns True if the detections (an ultralytics Boxes object) satisfy the rule. """
+        if boxes is None or len(boxes) == 0:
+            return False
+        cls = boxes.cls.cpu().numpy()
+        conf = boxes.conf.cpu().numpy()
+        # (boxes x conditions) matrix: box has the condition's class and enough confidence
+        hits = (cls[:, None] == self.class_ids[None, :]) & (conf[:, None] >= self.min_confidences[None, :])
+        satisfied = hits.sum(axis=0) >= self.min_counts
+        return bool(satisfied.all() if self.mode == "all" else satisfied.any())
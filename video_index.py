@@ -0,0 +1,141 @@
+import bisect
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+try:
+    import av  # PyAV, optional: gives real keyframe positions
+except ImportError:
+    av = None
+
+# Width of the poster frame saved next to each video
+POSTER_WIDTH = 200
+
+
+def index_path(video_path):
+    return video_path + ".index.json"
+
+
+def poster_path(video_path):
+    return video_path + ".poster.jpg"
+
+
+def read_keyframes(video_path, fps):
+    """
+    Returns the frame numbers of the keyframes in the video, read from the
+    container packets without decoding, or None without PyAV. The index then
+    holds estimates, one seek point per second, with exact_keyframes False;
+    they are not real keyframe positions, so players should seek straight to
+    the frame (OpenCV decodes forward from the preceding keyframe by itself).
+    """
+    if av is not None:
+        try:
+            with av.open(video_path) as container:
+                stream = container.streams.video[0]
+                keyframes = []
+                for packet in container.demux(stream):
+                    if packet.is_keyframe and packet.pts is not None:
+                        keyframes.append(int(round(float(packet.pts * stream.time_base) * fps)))
+                return sorted(set(keyframes))
+        except Exception as e:
+            print(f"Could not read keyframes of {video_path}: {e}")
+    return None
+
+
+def build_index(video_path):
+    """ Reads frame count, fps, duration, keyframes and a poster frame, and saves them as sidecar files. """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Unable to open video {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # Poster: a frame from a third of the way in, usually past any pre-roll
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count // 3)
+    success, frame = cap.read()
+    cap.release()
+    poster = None
+    if success:
+        poster_height = max(1, int(frame.shape[0] * POSTER_WIDTH / frame.shape[1]))
+        poster = poster_path(video_path)
+        cv2.imwrite(poster, cv2.resize(frame, (POSTER_WIDTH, poster_height), interpolation=cv2.INTER_AREA))
+
+    keyframes = read_keyframes(video_path, fps)
+    stat = os.stat(video_path)
+    index = {
+        "video_mtime": stat.st_mtime_ns,
+        "video_size": stat.st_size,
+        "frame_count": frame_count,
+        "fps": fps,
+        "duration": frame_count / fps if fps else 0.0,
+        "width": width,
+        "height": height,
+        "keyframes": keyframes if keyframes else list(range(0, frame_count, max(1, int(round(fps))))),
+        "exact_keyframes": bool(keyframes),
+        "poster": poster,
+    }
+    with open(index_path(video_path), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    return index
+
+
+def load_index(video_path):
+    """ Returns the saved index for a video, or None if there is none or the video has changed. """
+    try:
+        with open(index_path(video_path), encoding="utf-8") as f:
+            index = json.load(f)
+        stat = os.stat(video_path)
+    except (OSError, ValueError):
+        return None
+    if index.get("video_mtime") != stat.st_mtime_ns or index.get("video_size") != stat.st_size:
+        return None
+    return index
+
+
+def get_index(video_path):
+    return load_index(video_path) or build_index(video_path)
+
+
+def remove_sidecars(video_path):
+    for path in (index_path(video_path), poster_path(video_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def keyframe_before(index, frame_number):
+    """ Returns the last keyframe at or before 'frame_number'. """
+    keyframes = index["keyframes"]
+    position = bisect.bisect_right(keyframes, frame_number)
+    return keyframes[position - 1] if position else 0
+
+
+class VideoIndexer:
+    """ Builds (or loads) video indexes in the background; finished (path, index) pairs go to 'results'. """
+
+    def __init__(self, workers=2):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.results = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def request(self, video_path):
+        with self.lock:
+            if video_path in self.pending:
+                return
+            self.pending.add(video_path)
+        self.pool.submit(self._load, video_path)
+
+    def _load(self, video_path):
+        index = None
+        try:
+            index = get_index(video_path)
+        except Exception as e:
+            print(f"Error indexing video {video_path}: {e}")
+        with self.lock:
+            self.pending.discard(video_path)
+        self.results.put((video_path, index))